@@ -0,0 +1,221 @@
+#!python3
+"""Benchmark of the comparison pipeline on synthetic catalogs
+
+Generates a pair of catalogs with catalogGenerator, runs every stage of a
+comparison on them a few times and writes the timings as JSON, together
+with the commit, the generator's options and what the stages produced, so
+results of different commits can be compared:
+
+    python benchmark.py --entities 5000 --output before.json
+    python benchmark.py --entities 5000 --output after.json --baseline before.json
+
+Stages, in pipeline order:
+    plistlib_load   plistlib.load of both files, for reference
+    parse           load_ccdoc of both files
+    index           indexCatalog of both catalogs
+    prepare         delete_unnecessary_attributes of both catalogs
+    diff            diffPlists
+    classify        get_destroyed_created_and_changed_entities
+    convert         convert_difference_to_human_readable_text, the full report
+    render          the report's tables alone, from the records of convert"""
+import argparse
+import datetime
+import gc
+import json
+import os
+import platform
+import plistlib
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from catalogGenerator import generatorOptions, parseOptions, writeCatalogs
+from catalogIndex import indexCatalog
+from diffSession import DiffSession
+from main import (
+    convert_difference_to_human_readable_text,
+    delete_unnecessary_attributes,
+    get_destroyed_created_and_changed_entities,
+    load_ccdoc,
+)
+from terminalTest import (
+    Print_Entities_Changed_For_Lists_Tables,
+    Print_Entities_Changed_Tables,
+    Print_Entities_Tables,
+    count_changes,
+)
+from utils import diffPlists
+
+STAGES = ["plistlib_load", "parse", "index", "prepare", "diff", "classify", "convert", "render"]
+
+
+class NullStream:
+    """Stream counting what is written to it, instead of keeping it"""
+
+    def __init__(self):
+        self.characters = 0
+        self.lines = 0
+
+    def write(self, text):
+        self.characters += len(text)
+        self.lines += text.count("\n")
+        return len(text)
+
+    def flush(self):
+        pass
+
+    def isatty(self):
+        return False
+
+
+def runOnce(pathA, pathB):
+    """Run every stage once, returns the seconds per stage and what the stages produced"""
+    timings = {}
+    gc.collect()
+
+    def timed(stage, function, *args):
+        start = time.perf_counter()
+        result = function(*args)
+        timings[stage] = time.perf_counter() - start
+        return result
+
+    def plistlibLoad():
+        for path in (pathA, pathB):
+            with open(path, "rb") as file:
+                plistlib.load(file)
+
+    def prepare(plist):
+        delete_unnecessary_attributes(plist)
+        return plist
+
+    timed("plistlib_load", plistlibLoad)
+    plistA, plistB = timed("parse", lambda: (load_ccdoc(pathA), load_ccdoc(pathB)))
+    indexA, indexB = timed("index", lambda: (indexCatalog(plistA), indexCatalog(plistB)))
+    plistA, plistB = timed("prepare", lambda: (prepare(plistA), prepare(plistB)))
+
+    session = DiffSession((plistA, indexA), (plistB, indexB))
+    session.diffs = timed("diff", diffPlists, plistA, plistB)
+    (
+        session.destroyed_entities,
+        session.created_entities,
+        session.changed_entities,
+    ) = timed("classify", get_destroyed_created_and_changed_entities, session.diffs)
+
+    report = NullStream()
+    timed(
+        "convert", convert_difference_to_human_readable_text, session,
+        session.destroyed_entities, session.created_entities, session.changed_entities, "1", report,
+    )
+
+    def render():
+        stream = NullStream()
+        created = [change for change in session.events if change.event == "created"]
+        destroyed = [change for change in session.events if change.event == "destroyed"]
+        Print_Entities_Tables(created, stream)
+        Print_Entities_Tables(destroyed, stream)
+        Print_Entities_Changed_For_Lists_Tables(session.list_type_modifications, session, stream)
+        Print_Entities_Changed_Tables(session.nonlist_modifications, stream)
+
+    timed("render", render)
+
+    counts = {
+        "entities_a": {name: len(entities) for name, entities in plistA["entities"].items()},
+        "entities_b": {name: len(entities) for name, entities in plistB["entities"].items()},
+        "diff_paths": len(session.diffs),
+        "diff_entries": sum(len(entries) for entries in session.diffs.values()),
+        "destroyed_entities": len(session.destroyed_entities),
+        "created_entities": len(session.created_entities),
+        "changed_entities": len(session.changed_entities),
+        "summary": count_changes(session.events, session.list_type_modifications,
+                                 session.nonlist_modifications),
+        "report_lines": report.lines,
+        "report_characters": report.characters,
+    }
+    return timings, counts
+
+
+def currentCommit():
+    """Hash of the checked out commit, None outside of a git checkout"""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def runBenchmark(pathA, pathB, repeat=3):
+    """Run the stages `repeat` times, returns the results as a JSON-ready dict"""
+    runs = {stage: [] for stage in STAGES}
+    for _ in range(repeat):
+        timings, counts = runOnce(pathA, pathB)
+        for stage in STAGES:
+            runs[stage].append(timings[stage])
+
+    return {
+        "commit": currentCommit(),
+        "date": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "files": {"a": os.path.getsize(pathA), "b": os.path.getsize(pathB)},
+        "repeat": repeat,
+        "stages": {
+            stage: {"best": min(times), "median": statistics.median(times), "runs": times}
+            for stage, times in runs.items()
+        },
+        "total": sum(min(times) for times in runs.values()),
+        "counts": counts,
+    }
+
+
+def compareResults(results, baseline, stream):
+    """Write the change of every stage's best time against a previous result"""
+    stream.write(f"Against {baseline.get('commit') or 'baseline'}:\n")
+    for stage in STAGES + ["total"]:
+        new = results["total"] if stage == "total" else results["stages"][stage]["best"]
+        old = baseline.get("total") if stage == "total" else baseline.get("stages", {}).get(stage, {}).get("best")
+        if not old:
+            stream.write(f"  {stage:<14} {new:9.3f}s\n")
+            continue
+        stream.write(f"  {stage:<14} {old:9.3f}s -> {new:9.3f}s  {(new - old) / old:+7.1%}\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time every stage of a comparison of synthetic catalogs")
+    parseOptions(parser)
+    parser.add_argument("--repeat", type=int, default=3, help="Runs of every stage, the best one counts")
+    parser.add_argument("--output", help="Write the results to this file instead of stdout")
+    parser.add_argument("--baseline", help="Results of an earlier run to compare against, on stderr")
+    parser.add_argument("--keep", metavar="DIR",
+                        help="Write the generated catalogs to this directory and keep them")
+    args = parser.parse_args()
+    if args.repeat < 1:
+        parser.error("--repeat has to be at least 1")
+
+    options = generatorOptions(args)
+    fmt = plistlib.FMT_XML if args.xml else plistlib.FMT_BINARY
+    with tempfile.TemporaryDirectory() as directory:
+        directory = args.keep or directory
+        os.makedirs(directory, exist_ok=True)
+        pathA, pathB = os.path.join(directory, "a.ccdoc"), os.path.join(directory, "b.ccdoc")
+        writeCatalogs(pathA, pathB, fmt, **options)
+        results = runBenchmark(pathA, pathB, args.repeat)
+
+    results["generator"] = dict(options, format="xml" if args.xml else "binary")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(results, file, indent=2)
+    else:
+        json.dump(results, sys.stdout, indent=2)
+        sys.stdout.write("\n")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as file:
+            compareResults(results, json.load(file), sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+#!python3
+"""Persistent cache of parsed and indexed catalogs
+
+CatalogCache pickles whatever a loader built for a file, keyed by the file's
+content hash and the loader's version, and keeps its directory below a size
+limit by evicting the least recently used catalogs. Writing to the cache is
+best-effort, a cache that can't be written to only costs the time saved."""
+import hashlib
+import logging
+import os
+import pickle
+import tempfile
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "plist-compare")
+DEFAULT_MAX_BYTES = 1024 * 1024 * 1024
+SUFFIX = ".catalog"
+
+logger = logging.getLogger(__name__)
+
+
+def hashFile(path, chunkSize=1024 * 1024):
+    """SHA-256 of a file's content"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(chunkSize), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class CatalogCache:
+    """Directory of pickled catalogs with a size limit and LRU eviction
+
+    `version` is part of every key, bump it whenever the loader's output
+    changes so stale catalogs are never handed out."""
+
+    def __init__(self, directory=DEFAULT_CACHE_DIR, maxBytes=DEFAULT_MAX_BYTES, version=1):
+        self.directory = directory
+        self.maxBytes = maxBytes
+        self.version = version
+
+    def key(self, path):
+        """Cache key of a file, its content hash and the loader version"""
+        return f"{hashFile(path)}-v{self.version}"
+
+    def entryPath(self, key):
+        return os.path.join(self.directory, key + SUFFIX)
+
+    def load(self, path, loader):
+        """Get the catalog of `path`, calling `loader(path)` on a cache miss"""
+        entry = self.entryPath(self.key(path))
+        catalog = self.read(entry)
+        if catalog is None:
+            catalog = loader(path)
+            self.store(entry, catalog)
+        return catalog
+
+    def read(self, entry):
+        """Read a cached catalog, None if there is none"""
+        try:
+            with open(entry, "rb") as file:
+                catalog = pickle.load(file)
+        except Exception:
+            # Not cached yet, or a truncated entry which is built again
+            return None
+        # Mark as recently used, unless another process just evicted it
+        try:
+            os.utime(entry)
+        except FileNotFoundError:
+            pass
+        return catalog
+
+    def store(self, entry, catalog):
+        """Write a catalog atomically, then shrink the cache to its limit
+        A cache that can't be written to (not a directory, read-only or full)
+        is warned about and left as it is."""
+        tmp = None
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            with os.fdopen(fd, "wb") as file:
+                pickle.dump(catalog, file, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, entry)
+        except BaseException as error:
+            if tmp is not None:
+                try:
+                    os.unlink(tmp)
+                except OSError:
+                    pass
+            if not isinstance(error, OSError):
+                raise
+            logger.warning("Couldn't write to the catalog cache in %s: %s", self.directory, error)
+            return
+        self.evict()
+
+    def evict(self):
+        """Remove least recently used catalogs until the cache fits `maxBytes`
+        Catalogs that can't be removed are warned about and left in place."""
+        entries = []
+        total = 0
+        try:
+            names = os.listdir(self.directory)
+        except OSError as error:
+            logger.warning("Couldn't list the catalog cache in %s: %s", self.directory, error)
+            return
+        for name in names:
+            if not name.endswith(SUFFIX):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.maxBytes:
+                break
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+            except OSError as error:
+                logger.warning("Couldn't evict %s from the catalog cache: %s", path, error)
+                continue
+            total -= size
+
+    def clear(self):
+        """Remove every cached catalog"""
+        if not os.path.isdir(self.directory):
+            return
+        for name in os.listdir(self.directory):
+            if name.endswith(SUFFIX):
+                os.unlink(os.path.join(self.directory, name))
@@ -0,0 +1,351 @@
+#!python3
+"""Synthetic ccdoc catalogs for benchmarks
+
+generateCatalogs builds a catalog A shaped like the real ones: every entity
+type of ENTITIES_NAMES_KEYS with its items, collections and collection group,
+assets, content filters and notifications. Catalog B is a copy of A with a
+share of the entities changed, destroyed and created. References stay valid
+in both catalogs, items and collections of destroyed entities are removed
+with them, so the whole report can be built from any pair.
+
+    python catalogGenerator.py a.ccdoc b.ccdoc --entities 2000 --change-rate 0.05"""
+import argparse
+import copy
+import datetime
+import plistlib
+import random
+import uuid
+
+from constants import ENTITIES_NAMES_KEYS
+
+MODIFIED_A = datetime.datetime(2023, 1, 9, 10, 30)
+MODIFIED_B = datetime.datetime(2023, 6, 5, 17, 45)
+FONTS = ["SF Pro", "New York", "Avenir Next", "Futura", "Marker Felt"]
+COLORS = ["#FFFFFF", "#000000", "#FF3B30", "#34C759", "#007AFF", "#FFCC00"]
+LANGUAGES = ["en", "de", "fr", "ja", "zh-Hans", "ar", "es", "it", "ko", "pt-BR"]
+REGIONS = ["US", "CN", "DE", "FR", "JP", "KR", "SA", "BR", "IN", "GB"]
+KEYWORDS = ["summer", "party", "travel", "sports", "love", "music", "food", "pets", "retro", "neon"]
+
+# Changes made to entities of catalog B, by kind of entity
+ENTITY_CHANGES = ["rename", "style", "assets", "filter", "keywords", "add attribute", "remove attribute", "destroy"]
+COLLECTION_CHANGES = ["rename", "members", "destroy"]
+ASSET_CHANGES = ["describe", "on demand", "destroy"]
+NOTIFICATION_CHANGES = ["text", "priority"]
+
+
+def typeNames(entityName):
+    """Names of the item, collection and collection group types of an entity type,
+    and of the attributes listing items and collections"""
+    short = entityName[2:] if entityName.startswith("CC") else entityName
+    clips = short if short.startswith("Clips") else "Clips" + short
+    return {
+        "item": clips + "Item",
+        "collection": clips + "Collection",
+        "group": clips + "CollectionGroup",
+        "items": short + "Items",
+        "collections": short + "Collections",
+        "link": short,
+    }
+
+
+class Generator:
+    """Builds both catalogs from one seeded random generator, see generateCatalogs"""
+
+    def __init__(self, seed):
+        self.rnd = random.Random(seed)
+        self.counter = 0
+
+    def uuid(self):
+        return str(uuid.UUID(int=self.rnd.getrandbits(128), version=4)).upper()
+
+    def entity(self, name, attributes, bundleStyle=None):
+        return {
+            "uuid": self.uuid(),
+            "name": name,
+            "attributes": attributes,
+            "bundleStyle": bundleStyle if bundleStyle is not None else {},
+            "metadataVersion": 3,
+            "modified": MODIFIED_A,
+        }
+
+    def bundleStyle(self):
+        return {
+            "Font": self.rnd.choice(FONTS),
+            "TextColor": self.rnd.choice(COLORS),
+            "Scale": self.rnd.choice([0.5, 0.75, 1.0, 1.25]),
+        }
+
+    def displayName(self, name):
+        self.counter += 1
+        return f"{name[2:] if name.startswith('CC') else name} {self.counter}"
+
+    def asset(self):
+        self.counter += 1
+        return self.entity("CCAsset", [
+            {"name": "Description", "value": f"asset-{self.counter}.heic"},
+            {"name": "OnDemand", "value": self.rnd.random() < 0.3},
+            {"name": "Size", "value": self.rnd.randint(10_000, 5_000_000)},
+        ])
+
+    def mainEntity(self, name, assets, filters):
+        attributes = [
+            {"name": "DisplayName", "value": self.displayName(name)},
+            {"name": "Assets", "value": self.rnd.sample(assets, min(2, len(assets)))},
+            {"name": "ContentFilters", "value": [self.rnd.choice(filters)] if filters else []},
+            {"name": "SortOrder", "value": self.rnd.randint(0, 1000)},
+            {"name": "Keywords", "value": self.rnd.sample(KEYWORDS, 3)},
+        ]
+        if self.rnd.random() < 0.2:
+            attributes.append({"name": "Hidden"})
+        return self.entity(name, attributes, self.bundleStyle())
+
+    def item(self, names, entityUuid):
+        # Items hold nothing but the link to their entity
+        return self.entity(names["item"], [{"name": names["link"], "value": entityUuid}])
+
+    def collection(self, names, items, groupUuid):
+        return self.entity(names["collection"], [
+            {"name": "DisplayName", "value": self.displayName(names["collection"])},
+            {"name": names["items"], "value": items},
+            {"name": "CollectionGroup", "value": groupUuid},
+        ])
+
+
+def generateCatalogs(entities=100, items=None, collections=10, itemsPerCollection=8, assets=None,
+                     contentFilters=8, notifications=10, changeRate=0.05, seed=1,
+                     versions=("1.0", "1.1")):
+    """Build a catalog A and a catalog B changed from it, as plain plist dicts
+
+    `entities` is the number of entities of every type of ENTITIES_NAMES_KEYS,
+    or a dict of type -> number. Every entity has an item unless `items` limits
+    them per type. `assets` defaults to twice the entities of a type. In B about
+    `changeRate` of the entities, collections, assets and notifications are
+    changed or destroyed, and half as many entities and assets are created."""
+    generator = Generator(seed)
+    rnd = generator.rnd
+    if not isinstance(entities, dict):
+        entities = dict.fromkeys(ENTITIES_NAMES_KEYS, entities)
+    if assets is None:
+        assets = 2 * max(entities.values(), default=0)
+
+    catalog = {}
+    catalog["CCAsset"] = [generator.asset() for _ in range(assets)]
+    assetUuids = [asset["uuid"] for asset in catalog["CCAsset"]]
+
+    catalog["CCContentFilterLanguage"] = []
+    catalog["CCContentFilterAvailability"] = []
+    for i in range(contentFilters):
+        if i % 2:
+            name, key, values, exclusion = "CCContentFilterAvailability", "FilteredRegions", REGIONS, "Exclude"
+        else:
+            name, key, values, exclusion = "CCContentFilterLanguage", "FilteredLanguages", LANGUAGES, "Include"
+        catalog[name].append(generator.entity(name, [
+            {"name": "Description", "value": f"{name[2:]} {i}"},
+            {"name": "Exclusion Type", "value": exclusion},
+            {"name": key, "value": rnd.sample(values, rnd.randint(1, 4))},
+        ]))
+    filterUuids = [entity["uuid"] for entity in
+                   catalog["CCContentFilterLanguage"] + catalog["CCContentFilterAvailability"]]
+
+    for name, count in entities.items():
+        names = typeNames(name)
+        catalog[name] = [generator.mainEntity(name, assetUuids, filterUuids) for _ in range(count)]
+        itemCount = count if items is None else min(items, count)
+        catalog[names["item"]] = [generator.item(names, entity["uuid"]) for entity in catalog[name][:itemCount]]
+        itemUuids = [item["uuid"] for item in catalog[names["item"]]]
+
+        groupUuid = generator.uuid()
+        catalog[names["collection"]] = [
+            generator.collection(names, rnd.sample(itemUuids, min(itemsPerCollection, len(itemUuids))), groupUuid)
+            for _ in range(collections)
+        ]
+        group = generator.entity(names["group"], [
+            {"name": "DisplayName", "value": generator.displayName(names["group"])},
+            {"name": names["collections"], "value": [c["uuid"] for c in catalog[names["collection"]]]},
+        ])
+        group["uuid"] = groupUuid
+        catalog[names["group"]] = [group]
+
+    catalog["CCNotification"] = [
+        generator.entity("CCNotification", [
+            {"name": "AccessibilityText", "value": f"Notification {i}"},
+            {"name": "Priority", "value": rnd.randint(1, 3)},
+        ])
+        for i in range(notifications)
+    ]
+
+    catalogA = {"version": versions[0], "entities": catalog}
+    catalogB = copy.deepcopy(catalogA)
+    catalogB["version"] = versions[1]
+    changeCatalog(generator, catalogB["entities"], entities, changeRate, filterUuids)
+    return catalogA, catalogB
+
+
+def changeCatalog(generator, catalog, entities, changeRate, filterUuids):
+    """Change, destroy and create entities of catalog B in place"""
+    rnd = generator.rnd
+
+    def changed(entity):
+        entity["modified"] = MODIFIED_B
+        return {attribute["name"]: attribute for attribute in entity["attributes"]}
+
+    def destroy(name, doomed):
+        catalog[name] = [entity for entity in catalog[name] if entity["uuid"] not in doomed]
+
+    # Assets first, so new assets can be linked to entities
+    destroyedAssets = set()
+    for asset in catalog["CCAsset"]:
+        if rnd.random() >= changeRate:
+            continue
+        change = rnd.choice(ASSET_CHANGES)
+        attributes = changed(asset)
+        if change == "describe":
+            attributes["Description"]["value"] = "v2-" + attributes["Description"]["value"]
+        elif change == "on demand":
+            attributes["OnDemand"]["value"] = not attributes["OnDemand"]["value"]
+        else:
+            destroyedAssets.add(asset["uuid"])
+    destroy("CCAsset", destroyedAssets)
+    newAssets = [generator.asset() for _ in range(round(len(catalog["CCAsset"]) * changeRate / 2))]
+    catalog["CCAsset"].extend(newAssets)
+    assetUuids = [asset["uuid"] for asset in catalog["CCAsset"]]
+
+    for name in entities:
+        names = typeNames(name)
+        destroyedEntities = set()
+        for entity in catalog[name]:
+            if rnd.random() >= changeRate:
+                continue
+            change = rnd.choice(ENTITY_CHANGES)
+            attributes = changed(entity)
+            if change == "rename":
+                attributes["DisplayName"]["value"] += " (new)"
+            elif change == "style":
+                entity["bundleStyle"]["TextColor"] = rnd.choice(COLORS[:-1]) + "80"
+            elif change == "assets" and assetUuids:
+                attributes["Assets"]["value"] = attributes["Assets"]["value"][1:] + [rnd.choice(assetUuids)]
+            elif change == "filter" and filterUuids:
+                attributes["ContentFilters"]["value"] = [rnd.choice(filterUuids)]
+            elif change == "keywords":
+                attributes["Keywords"]["value"] = rnd.sample(KEYWORDS, 3)
+            elif change == "add attribute":
+                entity["attributes"].append({"name": "Badge", "value": rnd.choice(["New", "Limited"])})
+            elif change == "remove attribute":
+                entity["attributes"] = [a for a in entity["attributes"] if a["name"] != "SortOrder"]
+            elif change == "destroy":
+                destroyedEntities.add(entity["uuid"])
+        destroy(name, destroyedEntities)
+
+        # Items of destroyed entities go with them, and leave their collections
+        destroyedItems = {
+            item["uuid"] for item in catalog[names["item"]]
+            if item["attributes"][0]["value"] in destroyedEntities
+        }
+        destroy(names["item"], destroyedItems)
+
+        # Created entities get an item in one of the collections
+        created = [
+            generator.mainEntity(name, assetUuids, filterUuids)
+            for _ in range(round(entities[name] * changeRate / 2))
+        ]
+        catalog[name].extend(created)
+        newItems = [generator.item(names, entity["uuid"]) for entity in created]
+        catalog[names["item"]].extend(newItems)
+        itemUuids = [item["uuid"] for item in catalog[names["item"]]]
+
+        collections = catalog[names["collection"]]
+        for item in newItems:
+            if collections:
+                members = rnd.choice(collections)["attributes"][1]
+                members["value"] = members["value"] + [item["uuid"]]
+
+        destroyedCollections = set()
+        for collection in collections:
+            members = collection["attributes"][1]
+            if destroyedItems.intersection(members["value"]):
+                changed(collection)
+                members["value"] = [uuid for uuid in members["value"] if uuid not in destroyedItems]
+            if rnd.random() >= changeRate:
+                continue
+            change = rnd.choice(COLLECTION_CHANGES)
+            attributes = changed(collection)
+            if change == "rename":
+                attributes["DisplayName"]["value"] += " (new)"
+            elif change == "members":
+                candidates = [uuid for uuid in itemUuids if uuid not in members["value"]]
+                if candidates:
+                    members["value"] = members["value"][1:] + [rnd.choice(candidates)]
+            else:
+                destroyedCollections.add(collection["uuid"])
+        destroy(names["collection"], destroyedCollections)
+        for group in catalog[names["group"]]:
+            listed = group["attributes"][1]
+            if destroyedCollections.intersection(listed["value"]):
+                changed(group)
+                listed["value"] = [uuid for uuid in listed["value"] if uuid not in destroyedCollections]
+
+    for notification in catalog["CCNotification"]:
+        if rnd.random() >= changeRate:
+            continue
+        change = rnd.choice(NOTIFICATION_CHANGES)
+        attributes = changed(notification)
+        if change == "text":
+            attributes["AccessibilityText"]["value"] += " updated"
+        else:
+            attributes["Priority"]["value"] = attributes["Priority"]["value"] % 3 + 1
+
+
+def writeCatalogs(pathA, pathB, fmt=plistlib.FMT_BINARY, **options):
+    """Generate a pair of catalogs (see generateCatalogs) and write them as plists"""
+    catalogA, catalogB = generateCatalogs(**options)
+    for path, catalog in ((pathA, catalogA), (pathB, catalogB)):
+        with open(path, "wb") as file:
+            plistlib.dump(catalog, file, fmt=fmt)
+
+
+def parseOptions(parser):
+    """Add the generator's options to an ArgumentParser"""
+    parser.add_argument("--entities", type=int, default=1000,
+                        help="Entities of every type of ENTITIES_NAMES_KEYS")
+    parser.add_argument("--items", type=int,
+                        help="Items per entity type, one per entity by default")
+    parser.add_argument("--collections", type=int, default=20, help="Collections per entity type")
+    parser.add_argument("--items-per-collection", dest="itemsPerCollection", type=int, default=20,
+                        help="Items listed in every collection")
+    parser.add_argument("--assets", type=int, help="Assets, twice the entities of a type by default")
+    parser.add_argument("--content-filters", dest="contentFilters", type=int, default=8,
+                        help="Language and region content filters")
+    parser.add_argument("--notifications", type=int, default=20, help="Notifications")
+    parser.add_argument("--change-rate", dest="changeRate", type=float, default=0.05,
+                        help="Share of the entities changed or destroyed in catalog B")
+    parser.add_argument("--seed", type=int, default=1, help="Seed of the random generator")
+    parser.add_argument("--xml", action="store_true", help="Write XML plists instead of binary ones")
+
+
+def generatorOptions(args):
+    """The keyword arguments of generateCatalogs from parsed parseOptions arguments"""
+    return {
+        "entities": args.entities,
+        "items": args.items,
+        "collections": args.collections,
+        "itemsPerCollection": args.itemsPerCollection,
+        "assets": args.assets,
+        "contentFilters": args.contentFilters,
+        "notifications": args.notifications,
+        "changeRate": args.changeRate,
+        "seed": args.seed,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write a pair of synthetic ccdoc catalogs")
+    parser.add_argument("a", help="Path of catalog A")
+    parser.add_argument("b", help="Path of catalog B, changed from A")
+    parseOptions(parser)
+    args = parser.parse_args()
+    fmt = plistlib.FMT_XML if args.xml else plistlib.FMT_BINARY
+    writeCatalogs(args.a, args.b, fmt, **generatorOptions(args))
+
+
+if __name__ == "__main__":
+    main()
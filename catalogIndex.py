@@ -0,0 +1,93 @@
+#!python3
+"""Lookup tables of a loaded catalog
+
+indexCatalog walks the `entities` of a catalog once and files every entity
+into the uuid map of its kind, and the attributes of every entity into a
+name -> value map. The resulting CatalogIndex can't be changed afterwards,
+the maps are read-only views."""
+from types import MappingProxyType
+from typing import Mapping, NamedTuple
+
+from constants import (
+    ENTITIES_COLLECTIONS_NAMES_KEYS_SET,
+    ENTITIES_ITEMS_NAMES_KEYS_SET,
+    ENTITIES_NAMES_KEYS_SET,
+)
+
+
+class CatalogIndex(NamedTuple):
+    """uuid -> entity maps of a catalog, and uuid -> attribute map of every entity"""
+
+    entities: Mapping
+    entities_items: Mapping
+    entities_collections: Mapping
+    assets: Mapping
+    content_filters_language: Mapping
+    content_filters_region: Mapping
+    attributes: Mapping
+
+    def __reduce__(self):
+        # Read-only views can't be pickled, their dicts can
+        return makeCatalogIndex, tuple(dict(table) for table in self)
+
+
+def makeCatalogIndex(*tables):
+    """Build a CatalogIndex from plain uuid -> entity dicts"""
+    return CatalogIndex._make(MappingProxyType(table) for table in tables)
+
+
+def attributeMap(entity):
+    """name -> value of an entity's attributes
+
+    The first attribute of a name wins, like in a scan of the attributes."""
+    attributes = {}
+    for attribute in entity.get("attributes", ()):
+        name = attribute["name"]
+        if name not in attributes:
+            attributes[name] = attribute.get("value", "")
+    return attributes
+
+
+def indexCatalog(plist_entities):
+    """Build all lookup tables of a catalog in a single pass over its entities"""
+    entities = {}
+    entities_items = {}
+    entities_collections = {}
+    assets = {}
+    content_filters_language = {}
+    content_filters_region = {}
+    attributes = {}
+
+    for name, entity_list in plist_entities["entities"].items():
+        if name in ENTITIES_NAMES_KEYS_SET:
+            table = entities
+        elif name in ENTITIES_ITEMS_NAMES_KEYS_SET:
+            table = entities_items
+        elif name in ENTITIES_COLLECTIONS_NAMES_KEYS_SET:
+            table = entities_collections
+        elif name == "CCAsset":
+            table = assets
+        elif name == "CCContentFilterLanguage":
+            table = content_filters_language
+        elif name == "CCContentFilterAvailability":
+            table = content_filters_region
+        else:
+            table = None
+
+        for entity in entity_list:
+            uuid = entity.get("uuid")
+            if uuid is None:
+                continue
+            if table is not None:
+                table[uuid] = entity
+            attributes[uuid] = attributeMap(entity)
+
+    return makeCatalogIndex(
+        entities,
+        entities_items,
+        entities_collections,
+        assets,
+        content_filters_language,
+        content_filters_region,
+        attributes,
+    )
@@ -0,0 +1,195 @@
+#!python3
+"""Incremental reader for XML ccdoc files
+
+EntityStream feeds a file to an expat parser chunk by chunk and yields
+every entity of the `entities` dictionary as soon as it was read."""
+import binascii
+import datetime
+import plistlib
+import re
+from xml.parsers.expat import ParserCreate
+
+CHUNK_SIZE = 64 * 1024
+
+# Kinds of open containers
+ROOT, ENTITIES, ENTITY_TYPE, VALUE = range(4)
+
+DATE_PATTERN = re.compile(
+    r"(?P<year>\d\d\d\d)(?:-(?P<month>\d\d)(?:-(?P<day>\d\d)"
+    r"(?:T(?P<hour>\d\d)(?::(?P<minute>\d\d)(?::(?P<second>\d\d))?)?)?)?)?Z",
+    re.ASCII,
+)
+
+
+def parseDate(s):
+    """Parse a plist <date> the way plistlib does"""
+    match = DATE_PATTERN.match(s)
+    if match is None:
+        raise plistlib.InvalidFileException(f'Invalid date "{s}"')
+    parts = [
+        int(part)
+        for part in match.group("year", "month", "day", "hour", "minute", "second")
+        if part is not None
+    ]
+    return datetime.datetime(*parts)
+
+
+def isXmlPlist(header):
+    """Check whether the first bytes of a file belong to an XML plist"""
+    header = header.lstrip(b"\xef\xbb\xbf")
+    return header.startswith(b"<?xml") or header.startswith(b"<plist")
+
+
+class EntityStream:
+    """Read an XML ccdoc one entity at a time
+
+    Iterating yields `(entityTypeName, entityDict)` pairs in document order.
+    Everything besides the entities ends up in `header`, e.g. the version,
+    with an empty `entities` dict in its place for the consumer to fill.
+    `entityTypes` lists every entity type, including the empty ones."""
+
+    def __init__(self, fp, chunkSize=CHUNK_SIZE):
+        self.fp = fp
+        self.chunkSize = chunkSize
+        self.header = {}
+        self.entityTypes = []
+        self._stack = []
+        self._data = []
+        self._ready = []
+
+    def __iter__(self):
+        parser = ParserCreate()
+        parser.StartElementHandler = self._startElement
+        parser.EndElementHandler = self._endElement
+        parser.CharacterDataHandler = self._characterData
+        parser.EntityDeclHandler = self._entityDecl
+
+        while True:
+            chunk = self.fp.read(self.chunkSize)
+            parser.Parse(chunk, not chunk)
+
+            # Hand out the entities completed by this chunk
+            ready, self._ready = self._ready, []
+            yield from ready
+
+            if not chunk:
+                break
+
+    def _characterData(self, data):
+        self._data.append(data)
+
+    def _entityDecl(self, *args):
+        # Same safety measure as plistlib, no entity expansion attacks
+        raise plistlib.InvalidFileException(
+            "XML entity declarations are not supported in plist files"
+        )
+
+    def _startElement(self, tag, attrs):
+        self._data = []
+        if tag == "dict":
+            self._open({})
+        elif tag == "array":
+            self._open([])
+
+    def _open(self, container):
+        """Push a new container, deciding whether it is streamed or kept"""
+        kind = VALUE
+        name = None
+        if not self._stack:
+            if not isinstance(container, dict):
+                raise plistlib.InvalidFileException("A ccdoc has to be a dict")
+            kind = ROOT
+            container = self.header
+        else:
+            parent = self._stack[-1]
+            if parent[0] == ROOT and parent[2] == "entities":
+                if not isinstance(container, dict):
+                    raise plistlib.InvalidFileException("entities has to be a dict")
+                kind = ENTITIES
+                container = self.header["entities"] = {}
+                parent[2] = None
+            elif parent[0] == ENTITIES:
+                if not isinstance(container, list):
+                    raise plistlib.InvalidFileException(
+                        f'Entities "{parent[2]}" have to be an array'
+                    )
+                kind = ENTITY_TYPE
+                name = parent[2]
+                self.entityTypes.append(name)
+                parent[2] = None
+
+        # [kind, container, pending dict key or entity type name]
+        self._stack.append([kind, container, name])
+
+    def _endElement(self, tag):
+        data = "".join(self._data)
+        self._data = []
+
+        if tag == "key":
+            self._stack[-1][2] = data
+            return
+        if tag == "dict" or tag == "array":
+            kind, value, name = self._stack.pop()
+            if kind != VALUE:
+                # Already part of the header, or streamed
+                return
+        elif tag == "string":
+            value = data
+        elif tag == "integer":
+            if data.startswith("0x") or data.startswith("0X"):
+                value = int(data, 16)
+            else:
+                value = int(data)
+        elif tag == "real":
+            value = float(data)
+        elif tag == "true":
+            value = True
+        elif tag == "false":
+            value = False
+        elif tag == "date":
+            value = parseDate(data)
+        elif tag == "data":
+            value = binascii.a2b_base64(data.encode("utf-8"))
+        else:
+            # <plist> itself
+            return
+
+        self._add(value)
+
+    def _add(self, value):
+        """Add a finished value to the innermost open container"""
+        frame = self._stack[-1]
+        kind, container, key = frame
+
+        if kind == ENTITY_TYPE:
+            self._ready.append((key, value))
+        elif kind == ENTITIES:
+            raise plistlib.InvalidFileException(f'Entities "{key}" have to be an array')
+        elif isinstance(container, dict):
+            if key is None:
+                raise plistlib.InvalidFileException("Missing <key> in <dict>")
+            container[key] = value
+            frame[2] = None
+        else:
+            container.append(value)
+
+
+def loadCcdoc(fp, dropKeys=()):
+    """Read a whole XML ccdoc through an EntityStream
+
+    `dropKeys` are removed from every entity as soon as it was read, so they
+    never pile up for the whole catalog. The rest of the document is built
+    in full, like plistlib.load does."""
+    stream = EntityStream(fp)
+    for entityType, entity in stream:
+        for key in dropKeys:
+            entity.pop(key, None)
+        stream.header["entities"].setdefault(entityType, []).append(entity)
+
+    # Keep empty entity types and the document's order of types
+    if "entities" in stream.header:
+        entities = stream.header["entities"]
+        stream.header["entities"] = {
+            name: entities.get(name, []) for name in stream.entityTypes
+        }
+    return stream.header
@@ -0,0 +1,105 @@
+#!python3
+"""Records of the changes found between two catalogs, one type per kind of change"""
+
+
+class Change:
+    """Base of all change records, `event` names what happened"""
+
+    __slots__ = ()
+
+    def fields(self):
+        """Names of the record's fields, including the ones of its base classes"""
+        return [
+            name
+            for cls in reversed(type(self).__mro__)
+            for name in getattr(cls, "__slots__", ())
+        ]
+
+    def to_dict(self):
+        """The record as a plain dict, with its type and event, e.g. for JSON output"""
+        record = {"type": type(self).__name__, "event": self.event}
+        for name in self.fields():
+            record[name] = getattr(self, name)
+        return record
+
+    def __repr__(self):
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.fields())
+        return f"{type(self).__name__}({fields})"
+
+
+class EntityEvent(Change):
+    """An entity only one of the catalogs has"""
+
+    __slots__ = ("uuid", "entity_name", "display_name")
+
+    def __init__(self, uuid, entity_name, display_name):
+        self.uuid = uuid
+        self.entity_name = entity_name
+        self.display_name = display_name
+
+
+class EntityCreated(EntityEvent):
+    """An entity only catalog b has"""
+
+    __slots__ = ()
+    event = "created"
+
+
+class EntityDestroyed(EntityEvent):
+    """An entity only catalog a has"""
+
+    __slots__ = ()
+    event = "destroyed"
+
+
+class AttributeChanged(Change):
+    """An attribute value which changed, or an attribute only one version of an entity has
+
+    `event` is "changed", ATTRIBUTE_ADDED or ATTRIBUTE_REMOVED, the missing
+    value of the latter two is NO_ENTRY."""
+
+    __slots__ = ("uuid", "entity_name", "display_name", "key", "old_value", "new_value", "event")
+
+    def __init__(self, uuid, entity_name, display_name, key, old_value, new_value, event):
+        self.uuid = uuid
+        self.entity_name = entity_name
+        self.display_name = display_name
+        self.key = key
+        self.old_value = old_value
+        self.new_value = new_value
+        self.event = event
+
+
+class ListMembershipChanged(Change):
+    """Values "added" to or "removed" from a list attribute of an entity
+
+    `value` are the values joined by commas. For lists of entity items or
+    collections these are their display names, and `member_uuids` are the
+    uuids of the items or collections, otherwise `member_uuids` is None."""
+
+    __slots__ = ("uuid", "entity_name", "display_name", "key", "member_uuids", "value", "event")
+
+    def __init__(self, uuid, entity_name, display_name, key, member_uuids, value, event):
+        self.uuid = uuid
+        self.entity_name = entity_name
+        self.display_name = display_name
+        self.key = key
+        self.member_uuids = member_uuids
+        self.value = value
+        self.event = event
+
+
+class BundleStyleChanged(Change):
+    """A bundleStyle value which changed, or a key only one version of an entity has
+
+    `event` is "critical change", ATTRIBUTE_ADDED or ATTRIBUTE_REMOVED."""
+
+    __slots__ = ("uuid", "entity_name", "key", "old_value", "new_value", "event")
+
+    def __init__(self, uuid, entity_name, key, old_value, new_value, event):
+        self.uuid = uuid
+        self.entity_name = entity_name
+        self.key = key
+        self.old_value = old_value
+        self.new_value = new_value
+        self.event = event
@@ -0,0 +1,94 @@
+#!python3
+"""Progress of a comparison, and stopping it
+
+A comparison takes an optional `progress` callback, called as
+`progress(stage, entity_type=None, done=None, total=None)`. Every stage of
+COMPARISON_STAGES is reported as it starts, with `total` set to the amount
+of work it has if known. While it runs, the entity type it's working on and
+how much of `total` is done are reported at most every INTERVAL seconds,
+and once more when all of it is done.
+
+A callback returning a true value asks the comparison to stop, which it
+does by raising ComparisonCancelled at the next report. Callbacks run on
+the thread doing the comparison."""
+import sys
+import time
+
+# Seconds between two reports of a running stage
+INTERVAL = 0.1
+
+
+class ComparisonCancelled(Exception):
+    """Raised when the progress callback of a comparison asked to stop it"""
+
+
+def progressReporter(progress):
+    """A ProgressReporter of a progress callback, None without one
+    Reporters are returned as they are, so stages further down share one."""
+    if progress is None or isinstance(progress, ProgressReporter):
+        return progress
+    return ProgressReporter(progress)
+
+
+class ProgressReporter:
+    """Hands the progress of a comparison to a callback, throttled to every `interval` seconds"""
+
+    def __init__(self, callback, interval=INTERVAL):
+        self.callback = callback
+        self.interval = interval
+        self.stage = None
+        self.done = 0
+        self.total = None
+        self.due = 0.0
+
+    def begin(self, stage, total=None):
+        """Start `stage`, always reported"""
+        self.stage = stage
+        self.done = 0
+        self.total = total
+        self.due = time.monotonic() + self.interval
+        self.report(None)
+
+    def advance(self, entityType=None, count=1):
+        """Count `count` more of the stage's total done, working on `entityType`
+        Reported if the last report is `interval` ago, or if the stage is done"""
+        self.done += count
+        now = time.monotonic()
+        if now >= self.due or self.done == self.total:
+            self.due = now + self.interval
+            self.report(entityType)
+
+    def report(self, entityType):
+        if self.callback(self.stage, entityType, self.done, self.total):
+            raise ComparisonCancelled(self.stage)
+
+
+class ProgressBar:
+    """Progress callback drawing a bar on the last line of `stream` (stderr by default)"""
+
+    WIDTH = 30
+
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stderr
+        self.length = 0
+
+    def __call__(self, stage, entityType=None, done=None, total=None):
+        line = f"{stage:<8}"
+        if total:
+            filled = self.WIDTH * min(done, total) // total
+            line += f" [{'#' * filled}{'.' * (self.WIDTH - filled)}] {done * 100 // total:3}%"
+        if entityType:
+            line += f" {entityType}"
+        line = line[:79]
+        # Overwrite the previous line, longer ones entirely
+        self.stream.write("\r" + line.ljust(self.length))
+        self.stream.flush()
+        self.length = len(line)
+        return False
+
+    def close(self):
+        """End the bar's line"""
+        if self.length:
+            self.stream.write("\n")
+            self.stream.flush()
+            self.length = 0
@@ -75,6 +75,13 @@ ENTITIES_COLLECTION_GROUPS_NAMES_KEYS = [
     "ClipsAREffectCollectionGroup",
 ]
 
+# sets of the names above, for membership tests
+ENTITIES_ITEMS_NAMES_SET = frozenset(ENTITIES_ITEMS_NAMES)
+ENTITIES_COLLECTIONS_NAMES_SET = frozenset(ENTITIES_COLLECTIONS_NAMES)
+ENTITIES_NAMES_KEYS_SET = frozenset(ENTITIES_NAMES_KEYS)
+ENTITIES_ITEMS_NAMES_KEYS_SET = frozenset(ENTITIES_ITEMS_NAMES_KEYS)
+ENTITIES_COLLECTIONS_NAMES_KEYS_SET = frozenset(ENTITIES_COLLECTIONS_NAMES_KEYS)
+
 ENTITY_LINK_KEYS = [
     "Assets",
     "ContentFilters",
@@ -93,3 +100,42 @@ ENTITY_LINK_KEYS = [
 
 # messages
 MODIFICATION_MESSAGE = "{} - {}: {} - {} was modified from {} to {}"
+
+# events of attributes (and bundleStyle keys) only one version of an entity has
+ATTRIBUTE_ADDED = "attribute added"
+ATTRIBUTE_REMOVED = "attribute removed"
+# placeholder of the missing value of an added or removed attribute
+NO_ENTRY = "<no entry>"
+
+# kinds of events counted in a summary
+SUMMARY_COUNT_KEYS = (
+    "created",
+    "destroyed",
+    "added",
+    "removed",
+    "modified",
+    "attributes_added",
+    "attributes_removed",
+)
+
+# report formats, tables for people and JSON Lines for other programs
+TABLE_FORMAT = "table"
+JSONL_FORMAT = "jsonl"
+OUTPUT_FORMATS = [TABLE_FORMAT, JSONL_FORMAT]
+
+REPORT_SELECTION_MESSAGE = "Select from the following Reports: [Full Dev Report => 1 | Consumer-Facing Report => 2] "
+REPORT_SELECTIONS = ["1", "2"]
+
+# stages of a comparison, in the order they are reported to a progress callback
+COMPARISON_STAGES = ["load", "diff", "classify", "report"]
+
+# Report of every pair in batch mode, and the name of the batch's index file
+BATCH_REPORT_SELECTION = "1"
+BATCH_INDEX_NAME = "index.json"
+
+# entity keys we don't care about when comparing
+UNNECESSARY_ATTRIBUTES = ["metadataVersion", "modified"]
+
+# version of a loaded and indexed catalog, bump it whenever `main.load_catalog`
+# changes what it returns so catalogs in the cache are rebuilt
+CATALOG_VERSION = 3
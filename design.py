@@ -14,7 +14,7 @@ from PyQt5 import QtCore, QtGui, QtWidgets
 class Ui_MainWindow(object):
     def setupUi(self, MainWindow):
         MainWindow.setObjectName("MainWindow")
-        MainWindow.resize(511, 360)
+        MainWindow.resize(511, 400)
         MainWindow.setStyleSheet("QLineEdit {\n"
 "padding: 5px;\n"
 "}\n"
@@ -63,6 +63,14 @@ class Ui_MainWindow(object):
         self.consumerRadioButton.setObjectName("consumerRadioButton")
         self.horizontalLayout.addWidget(self.consumerRadioButton)
         self.gridLayout.addWidget(self.frame, 3, 0, 1, 1)
+        self.progressBar = QtWidgets.QProgressBar(self.centralwidget)
+        self.progressBar.setProperty("value", 0)
+        self.progressBar.setObjectName("progressBar")
+        self.gridLayout.addWidget(self.progressBar, 5, 0, 1, 1)
+        self.cancelButton = QtWidgets.QPushButton(self.centralwidget)
+        self.cancelButton.setEnabled(False)
+        self.cancelButton.setObjectName("cancelButton")
+        self.gridLayout.addWidget(self.cancelButton, 5, 1, 1, 1)
         MainWindow.setCentralWidget(self.centralwidget)
 
         self.retranslateUi(MainWindow)
@@ -86,3 +94,4 @@ class Ui_MainWindow(object):
         self.selectOldPlistButton.setText(_translate("MainWindow", "Select Old .ccdoc"))
         self.fullDevRadioButton.setText(_translate("MainWindow", "Full Dev"))
         self.consumerRadioButton.setText(_translate("MainWindow", "Consumer"))
+        self.cancelButton.setText(_translate("MainWindow", "Cancel"))
@@ -0,0 +1,32 @@
+#!python3
+"""State of a single comparison"""
+
+
+class DiffSession:
+    """One comparison of catalog a (old) against catalog b (new)
+
+    Sessions share nothing, so several of them can run at the same time,
+    from different threads too. Catalogs are `(plist, CatalogIndex)` tuples
+    as returned by `main.load_catalog`."""
+
+    def __init__(self, catalog_a, catalog_b):
+        self.plist_a, self.index_a = catalog_a
+        self.plist_b, self.index_b = catalog_b
+
+        # Filled in while the comparison runs
+        self.diffs = None
+        self.destroyed_entities = None
+        self.created_entities = None
+        self.changed_entities = None
+        self.events = None
+        self.list_type_modifications = None
+        self.nonlist_modifications = None
+        self.summary = None
+
+    @property
+    def version_a(self):
+        return self.plist_a.get("version")
+
+    @property
+    def version_b(self):
+        return self.plist_b.get("version")
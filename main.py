@@ -1,85 +1,168 @@
+import os
+import sys
+import json
 import plistlib
 import argparse
-import copy
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import freeze_support
 from typing import List, Dict
 from constants import *
 from terminalTest import *
 from utils import *
-
-
-def delete_unnecessary_attributes(a, b):
+from catalogCache import CatalogCache, DEFAULT_CACHE_DIR, DEFAULT_MAX_BYTES
+from ccdocStream import isXmlPlist, loadCcdoc
+from catalogIndex import CatalogIndex, indexCatalog
+from comparisonProgress import ProgressBar, progressReporter
+from diffSession import DiffSession
+from pipelineProfile import Profile, profileStage
+from changeRecords import (
+    AttributeChanged,
+    BundleStyleChanged,
+    EntityCreated,
+    EntityDestroyed,
+    ListMembershipChanged,
+)
+
+
+def delete_unnecessary_attributes(*plists):
     """Deletes unnecessary attributes from the entites that we don't care about
     For example, metadataVersion and modified"""
-    for list_of_attributes in a["entities"].values():
-        for attribute in list_of_attributes:
-            del attribute["metadataVersion"]
-            del attribute["modified"]
+    for plist in plists:
+        for list_of_attributes in plist["entities"].values():
+            for attribute in list_of_attributes:
+                for key in UNNECESSARY_ATTRIBUTES:
+                    attribute.pop(key, None)
+
+
+def load_ccdoc(file_path):
+    """Loads a ccdoc/plist file
+    XML files are streamed entity by entity, dropping the unnecessary attributes
+    right away, and still built in full as the diff needs the whole tree.
+    Binary files are decoded in full by plistlib, the diff reads every object
+    of them anyway"""
+    with open(file_path, "rb") as file:
+        header = file.read(32)
+        file.seek(0)
+        if isXmlPlist(header):
+            return loadCcdoc(file, UNNECESSARY_ATTRIBUTES)
+        return plistlib.load(file)
+
+
+def get_destroyed_created_and_changed_entities(diffs: dict, classified: dict = None, progress=None):
+    """It will compare all the items in `diffs` and return 3 lists [destroyed, created, changed]
+    `classified` holds the lists of paths already classified by `classify_entity_list`
+    The diff entries done are reported to `progress` (see comparisonProgress) if given"""
+    destroyed_entity = []
+    created_entity = []
+    changed_entity = []
 
-    for list_of_attributes in b["entities"].values():
-        for attribute in list_of_attributes:
-            del attribute["metadataVersion"]
-            del attribute["modified"]
+    progress = progressReporter(progress)
+    if progress is not None:
+        progress.begin("classify", sum(len(entity_list) for entity_list in diffs.values()))
 
+    for entity_name, entity_list in diffs.items():
+        # entity_name are entities.CCAsset or entities.CCContentLink etc.
+        if classified and entity_name in classified:
+            destroyed, created, changed = classified[entity_name]
+        else:
+            destroyed, created, changed = classify_entity_list(entity_list)
+        destroyed_entity.extend(destroyed)
+        created_entity.extend(created)
+        changed_entity.extend(changed)
+        if progress is not None:
+            progress.advance(entity_name, len(entity_list))
 
-def get_destroyed_created_and_changed_entities(diffs: dict):
-    """It will compare all the items in `diffs` and return 3 lists [destroyed, created, changed]"""
+    return destroyed_entity, created_entity, changed_entity
+
+
+def classify_entity_list(entity_list: list):
+    """Sorts the diff entries of one entity list into 3 lists [destroyed, created, changed]
+    The 'b' side of the entity list is indexed by uuid, so pairing is linear"""
     destroyed_entity = []
     created_entity = []
     changed_entity = []
 
-    for entity_name, entity_list in diffs.items():
-        # entity_name are entities.CCAsset or entities.CCContentLink etc.
-        entity_list_copy = copy.deepcopy(entity_list)
-        count_a = count_b = 0
-
-        for i in range(len(entity_list)):
-            a_b_dic = entity_list[i]
-            try:
-                uuid_a = a_b_dic["a"]["uuid"]
-            except TypeError:
-                # There wass an error, it means 'a' was <no-entry>
-                # Break out of loop, because rest of list's `a` is <no-entry>
+    # Positions of the 'b' entities, grouped by their uuid
+    positions_b = {}
+    for position, a_b_dic in enumerate(entity_list):
+        entity_b = a_b_dic["b"]
+        if isinstance(entity_b, dict) and "uuid" in entity_b:
+            positions_b.setdefault(entity_b["uuid"], []).append(position)
+
+    consumed = set()
+    count_b = 0
+    for position, a_b_dic in enumerate(entity_list):
+        entity_a = a_b_dic["a"]
+        if not isinstance(entity_a, dict):
+            # 'a' was <no entry>
+            # Break out of loop, because rest of list's `a` is <no entry>
+            break
+
+        # An 'A' item was read
+        consumed.add(position)
+        partner = None
+        for position_b in positions_b.get(entity_a["uuid"], ()):
+            if position_b > position:
+                partner = position_b
                 break
 
-            for j in range(len(entity_list)):
-                try:
-                    a_b_dic2 = entity_list[i + j + 1]
-                except IndexError:
-                    # List ended, no more items to look for
-                    # The entity must have been removed
-                    destroyed_entity.append(a_b_dic["a"])
-                    entity_list_copy[i] = None
-                    # An 'A' item was read
-                    count_a += 1
-                    break
-                try:
-                    uuid_b = a_b_dic2["b"]["uuid"]
-                except TypeError:
-                    # 'b' was no entry, skip
-                    continue
-                if uuid_a == uuid_b:
-                    # Duplicate values
-                    changed_entity.append([a_b_dic["a"], a_b_dic2["b"]])
-                    entity_list_copy[i] = None
-                    entity_list_copy[i + j + 1] = None
-
-                    # An 'A' and a 'B' item was read
-                    count_a += 1
-                    count_b += 1
-                    break
-
-        actual_count_b = count_items_in_entity(entity_list)[1]
-        count_diff = actual_count_b > count_b
-        if count_diff != 0:
-            # There were some entities added in new version of plist
-            # Append all entities which were added in new version
-            for entity in entity_list_copy:
-                if entity:
-                    created_entity.append(entity["b"])
+        if partner is None:
+            # No 'b' with the same uuid, the entity must have been removed
+            destroyed_entity.append(entity_a)
+            continue
+
+        changed_entity.append([entity_a, entity_list[partner]["b"]])
+        # A 'B' item was read as well
+        consumed.add(partner)
+        count_b += 1
+
+    actual_count_b = count_items_in_entity(entity_list)[1]
+    if actual_count_b > count_b:
+        # There were some entities added in new version of plist
+        # Append all entities which were added in new version
+        for position, a_b_dic in enumerate(entity_list):
+            if position not in consumed:
+                created_entity.append(a_b_dic["b"])
 
     return destroyed_entity, created_entity, changed_entity
 
 
+def diff_part(a, b, key, idx_a, idx_b, keys):
+    """Diffs and classifies one part of the catalogs from `splitDiff`
+    Runs in the worker processes of `--jobs`. The entries are sent back as plain
+    lists, their fingerprints are only needed to merge paths, which parts never share"""
+    res, rev = diffPart(a, b, key, idx_a, idx_b, keys)
+    res = {path: list(entries) for path, entries in res.items()}
+    rev = {path: list(entries) for path, entries in rev.items()}
+    classified = {}
+    for diffs in (res, rev):
+        for path, entity_list in diffs.items():
+            classified[path] = classify_entity_list(entity_list)
+    return res, rev, classified
+
+
+def diff_in_parallel(plist_a, plist_b, executor, progress=None):
+    """Diffs two catalogs with every entity type in a task of its own on `executor`
+    The entities of every collected part are reported to `progress` if given.
+    Returns the same diffs as `diffPlists` and the classification of their paths"""
+    split = splitDiff(plist_a, plist_b)
+    futures = [executor.submit(diff_part, *part) for part in split]
+    progress = progressReporter(progress)
+    if progress is not None:
+        progress.begin("diff", sum(partSize(part) for part in split))
+
+    # Collect in the order of the parts, whichever finishes first
+    parts = []
+    classified = {}
+    for part, future in zip(split, futures):
+        res, rev, classified_part = future.result()
+        parts.append((res, rev))
+        classified.update(classified_part)
+        if progress is not None:
+            progress.advance(partPath(part), partSize(part))
+    return mergeParts(parts), classified
+
+
 def get_added_removed(list_a, list_b):
     """
     Takes two lists, `list_a` and `list_b`, and returns a tuple of two lists.
@@ -97,167 +180,203 @@ def get_added_removed(list_a, list_b):
     return (added, removed)
 
 
-def find_changes_in_attributes(dic1: dict, dic2: dict, entity: dict) -> list:
+def find_changes_in_attributes(session: DiffSession, dic1: dict, dic2: dict, entity: dict) -> list:
     """
-    Compares the values of two dictionaries and returns a string containing any modifications made to the attributes of the second dictionary.
-    If the value of a key in the second dictionary is different from the value of the same key in the first dictionary, the function will return a list about the modification.
+    Compares the values of two dictionaries and returns the modifications made to the attributes of the second dictionary.
+    If the value of a key in the second dictionary is different from the value of the same key in the first dictionary, the function will return records about the modification.
 
     Parameters:
+    session (DiffSession): The comparison the attributes belong to.
     dic1 (dict): The old dictionary to compare.
     dic2 (dict): The new dictionary to compare.
     entity (dict): The entity that the attributes belongs to.
 
     Returns:
-    list: A list containing information about modifications made to the attributes of the second dictionary.
+    list: ListMembershipChanged records for list values, an AttributeChanged record for other values.
     """
-    result = []
+    changes = []
     key = dic1["name"]
-    display_name = get_display_name(entity)
+    display_name = get_display_name(entity, session.index_a)
     item_a, item_b = dic1.get("value"), dic2.get("value")
 
     # If there is no value key, None != None will be False
-    if item_a != item_b:
-        if isinstance(item_a, list):
-            added, removed = get_added_removed(item_a, item_b)
-            uuids = None
-            if key in ENTITIES_ITEMS_NAMES:
-                # added and removed are uuids of entities_items
-                # Collections have changed
-                added, removed, uuids = get_display_names_from_entity_item_uuids(
-                    added, removed
-                )
-            elif key in ENTITIES_COLLECTIONS_NAMES:
-                # added and removed are uuids of entities_collections
-                # Groups have changed
-                added, removed, uuids = get_display_names_from_entity_collection_uuids(
-                    added, removed
-                )
-            if uuids:
-                result.extend([uuids, entity["name"], display_name, key])
-            else:
-                result.extend([entity['uuid'], entity["name"], display_name, key])
-            if added:
-                result.extend([",".join(added), "added"])
-            if removed:
-                result.extend([",".join(removed), "removed"])
-        else:
-            if display_name:
-                result.extend(
-                    [entity["uuid"], entity["name"], display_name, key, item_a, item_b, "changed"]
-                )
-            else:
-                # If the entity was an asset, it is a boolean value
-                if entity["name"] == 'CCAsset':
-                    # old_value = item_a
-                    # new_value = item_b
-                    result.extend(
-                        [entity["uuid"], entity["name"], key, item_a, item_b, "changed"]
-                    )
-                elif entity['name'] == 'CCNotification':
-                    result.extend(
-                        [entity["uuid"], entity["name"], key, item_a, item_b, "changed"]
-                    )
-                
-                else:
-                    pass
-                    # print(f"Skipping an entity. This entity {entity['name']} will not be tracked for modification")
-
-    return result
+    if item_a == item_b:
+        return changes
+
+    if isinstance(item_a, list):
+        added, removed = get_added_removed(item_a, item_b)
+        uuids_added = uuids_removed = None
+        if key in ENTITIES_ITEMS_NAMES_SET:
+            # added and removed are uuids of entities_items
+            # Collections have changed
+            uuids_added, uuids_removed = added, removed
+            added, removed = get_display_names_from_entity_item_uuids(session, added, removed)
+        elif key in ENTITIES_COLLECTIONS_NAMES_SET:
+            # added and removed are uuids of entities_collections
+            # Groups have changed
+            uuids_added, uuids_removed = added, removed
+            added, removed = get_display_names_from_entity_collection_uuids(session, added, removed)
+        if added:
+            changes.append(ListMembershipChanged(
+                entity["uuid"], entity["name"], display_name, key, uuids_added, ",".join(added), "added"
+            ))
+        if removed:
+            changes.append(ListMembershipChanged(
+                entity["uuid"], entity["name"], display_name, key, uuids_removed, ",".join(removed), "removed"
+            ))
+    else:
+        change = make_attribute_change(entity, display_name, key, item_a, item_b, "changed")
+        if change:
+            changes.append(change)
+
+    return changes
+
+
+def make_attribute_change(entity: dict, display_name: str, key: str, old_value, new_value, event: str):
+    """Returns the AttributeChanged record of an attribute of `entity`
+    Entities without a display name are only tracked if they are assets or notifications,
+    None is returned for the others"""
+    # If the entity was an asset, it is a boolean value
+    if display_name or entity["name"] in ('CCAsset', 'CCNotification'):
+        return AttributeChanged(entity["uuid"], entity["name"], display_name, key, old_value, new_value, event)
+    # print(f"Skipping an entity. This entity {entity['name']} will not be tracked for modification")
+    return None
 
 
 def get_display_names_from_entity_collection_uuids(
-    added: List[str], removed: List[str]
+    session: DiffSession, added: List[str], removed: List[str]
 ):
 
     display_names_removed = []
     display_names_added = []
-    uuids = []
 
     for uuid in added:
-        uuids.append(uuid)
-        entity_collection = entities_collections_b[uuid]
-        display_name = get_display_name(entity_collection)
+        entity_collection = session.index_b.entities_collections[uuid]
+        display_name = get_display_name(entity_collection, session.index_b)
         display_names_added.append(display_name)
 
     for uuid in removed:
-        uuids.append(uuid)
-        entity_collection = entities_collections_a[uuid]
-        display_name = get_display_name(entity_collection)
+        entity_collection = session.index_a.entities_collections[uuid]
+        display_name = get_display_name(entity_collection, session.index_a)
         display_names_removed.append(display_name)
 
-    return display_names_added, display_names_removed, uuids
+    return display_names_added, display_names_removed
 
 
-def get_display_names_from_entity_item_uuids(added: List[str], removed: List[str]):
+def get_display_names_from_entity_item_uuids(session: DiffSession, added: List[str], removed: List[str]):
 
     display_names_removed = []
     display_names_added = []
-    uuids = []
 
     for uuid in added:
-        uuids.append(uuid)
-        entity_item = entities_items_b[uuid]
+        entity_item = session.index_b.entities_items[uuid]
         for attr in entity_item["attributes"]:
             entity_id = attr["value"]
-            entity = entities_b[entity_id]
-            display_name = get_display_name(entity)
+            entity = session.index_b.entities[entity_id]
+            display_name = get_display_name(entity, session.index_b)
             display_names_added.append(display_name)
 
     for uuid in removed:
-        uuids.append(uuid)
-        entity_item = entities_items_a[uuid]
+        entity_item = session.index_a.entities_items[uuid]
         for attr in entity_item["attributes"]:
             entity_id = attr["value"]
-            entity = entities_a[entity_id]
-            display_name = get_display_name(entity)
+            entity = session.index_a.entities[entity_id]
+            display_name = get_display_name(entity, session.index_a)
             display_names_removed.append(display_name)
 
-    return display_names_added, display_names_removed, uuids
+    return display_names_added, display_names_removed
 
 
-def find_changes_in_entities(entity: List[Dict]) -> tuple:
+def find_changes_in_entities(session: DiffSession, entity: List[Dict]) -> tuple:
     """
     Takes in a list of two entities and returns a tuple of list containing any modifications made to the attributes of the second entity.
     It compares the attributes of the first entity with the attributes of the second entity and returns the differences.
 
     Parameters:
+    session (DiffSession): The comparison the entities belong to.
     entity (list): A list of two entities
 
     Returns:
-    tuple: A string containing modifications made to the attributes of the second entity
+    tuple: The ListMembershipChanged records, and the AttributeChanged and BundleStyleChanged records
     """
     a, b = entity
     non_list_modifications = []
     list_type_modifications = []
-    for attr_a, attr_b in zip(a["attributes"], b["attributes"]):
-        modifications = find_changes_in_attributes(attr_a, attr_b, a)
-        if modifications:
-            if modifications[-1] == 'changed':
-                non_list_modifications.append(modifications)
+
+    # Join the attributes on their names, an inserted attribute doesn't shift the others
+    attributes_b = {}
+    for attr_b in b["attributes"]:
+        attributes_b.setdefault(attr_b["name"], attr_b)
+    names_a = set()
+
+    for attr_a in a["attributes"]:
+        name = attr_a["name"]
+        if name in names_a:
+            continue
+        names_a.add(name)
+
+        attr_b = attributes_b.get(name)
+        if attr_b is None:
+            change = find_added_or_removed_attribute(session, attr_a, a, ATTRIBUTE_REMOVED)
+            if change:
+                non_list_modifications.append(change)
+            continue
+
+        for change in find_changes_in_attributes(session, attr_a, attr_b, a):
+            if isinstance(change, ListMembershipChanged):
+                list_type_modifications.append(change)
             else:
-                if len(modifications) == 8:
-                    # There was something removed as well as added 
-                    # TODO: don't add the whole uuid
-                    #! Might be problems later
-                    len_of_added = len(modifications[4].split(','))
-                    if isinstance(modifications[0], list):
-                        list_type_modifications.append([modifications[0][:len_of_added]] + modifications[1:4] + modifications[4:6])
-                        list_type_modifications.append([modifications[0][len_of_added:]] + modifications[1:4] + modifications[6:8])
-                    else:
-                        # When the key is ContentFilters, or others if added later
-                        list_type_modifications.append(modifications[:4] + modifications[4:6])
-                        list_type_modifications.append(modifications[:4] + modifications[6:8])
-                else:
-                    # There was something either removed or added, not both
-                    list_type_modifications.append(modifications)
-
-    for bundle_a, bundle_b in zip(a["bundleStyle"].items(), b["bundleStyle"].items()):
-        modifications = find_changes_in_bundle_style(bundle_a, bundle_b, a)
-        if modifications:
-            non_list_modifications.append(modifications)
+                non_list_modifications.append(change)
+
+    for name, attr_b in attributes_b.items():
+        if name not in names_a:
+            change = find_added_or_removed_attribute(session, attr_b, a, ATTRIBUTE_ADDED)
+            if change:
+                non_list_modifications.append(change)
+
+    # Join the bundle styles on their keys as well
+    bundle_style_a, bundle_style_b = a["bundleStyle"], b["bundleStyle"]
+    for key, old_value in bundle_style_a.items():
+        if key in bundle_style_b:
+            change = find_changes_in_bundle_style((key, old_value), (key, bundle_style_b[key]), a)
+        else:
+            change = BundleStyleChanged(a['uuid'], a['name'], key, old_value, NO_ENTRY, ATTRIBUTE_REMOVED)
+        if change:
+            non_list_modifications.append(change)
+    for key, new_value in bundle_style_b.items():
+        if key not in bundle_style_a:
+            non_list_modifications.append(
+                BundleStyleChanged(a['uuid'], a['name'], key, NO_ENTRY, new_value, ATTRIBUTE_ADDED)
+            )
 
     return (list_type_modifications, non_list_modifications)
 
+
+def find_added_or_removed_attribute(session: DiffSession, attribute: dict, entity: dict, event: str):
+    """
+    Returns the AttributeChanged record of an attribute only one version of an entity has.
+
+    Parameters:
+    session (DiffSession): The comparison the attribute belongs to.
+    attribute (dict): The attribute which was added or removed.
+    entity (dict): The old version of the entity that the attribute belongs to.
+    event (str): ATTRIBUTE_ADDED or ATTRIBUTE_REMOVED.
+
+    Returns:
+    AttributeChanged: The modification, None if the entity isn't tracked for modifications
+    """
+    key = attribute["name"]
+    value = attribute.get("value", '')
+    if isinstance(value, list):
+        value = ",".join(str(item) for item in value)
+    if event == ATTRIBUTE_ADDED:
+        item_a, item_b = NO_ENTRY, value
+    else:
+        item_a, item_b = value, NO_ENTRY
+
+    display_name = get_display_name(entity, session.index_a)
+    return make_attribute_change(entity, display_name, key, item_a, item_b, event)
+
 def find_changes_in_bundle_style(bundle_a: tuple, bundle_b: tuple, entity):
     uuid = entity['uuid']
     entity_name = entity['name']
@@ -265,151 +384,206 @@ def find_changes_in_bundle_style(bundle_a: tuple, bundle_b: tuple, entity):
     new_key, new_value = bundle_b # bundle_b is expected to be a tuple of 2 items
     if old_key == new_key and old_value != new_value:
         # Different values
-        return uuid, entity_name, old_key, old_value, new_value, 'critical change'
+        return BundleStyleChanged(uuid, entity_name, old_key, old_value, new_value, 'critical change')
 
 
 
-def get_display_name(entity: dict) -> str:
+def get_display_name(entity: dict, index: CatalogIndex = None) -> str:
     """Returns the human readable display name of an entity
-    It can be get from either `DisplayName` attribute"""
+    It can be get from either `DisplayName` attribute
+    `index` is the CatalogIndex of the entity's catalog, see `get_attribute_in_entity`"""
     if entity["name"] == "CCAsset":
         return ""
-    display_name = get_attribute_in_entity("DisplayName", entity)
+    display_name = get_attribute_in_entity("DisplayName", entity, index)
     return display_name
 
 
+def get_entity_description(entity: dict, index: CatalogIndex = None) -> str:
+    """Returns the display name of an entity, for entities without one
+    the `Description` or `AccessibilityText` attribute"""
+    display_name = get_display_name(entity, index)
+    if display_name:
+        return display_name
+    if entity["name"] in ['CCAsset', 'CCContentFilterAvailability', 'CCContentFilterLanguage',]: # Contains Description
+        return get_attribute_in_entity('Description', entity, index)
+    if entity["name"] in ['CCNotification']: # Contains 'AccessibilityText'
+        return get_attribute_in_entity('AccessibilityText', entity, index)
+    return ''
+
+
+def iter_changes(
+    session: DiffSession,
+    destroyed_entities: List[Dict],
+    created_entities: List[Dict],
+    modified_entities: List[List[Dict]],
+    progress=None,
+):
+    """Yields the change record of every created, destroyed and modified entity,
+    each one as soon as it is classified"""
+    yield from iter_entity_events(session, destroyed_entities, created_entities, progress)
+    yield from iter_modifications(session, modified_entities, progress)
+
+
+def iter_entity_events(session: DiffSession, destroyed_entities: List[Dict], created_entities: List[Dict],
+                       progress=None):
+    """Yields an EntityCreated record for every created entity, then an
+    EntityDestroyed record for every destroyed one
+    Every entity done is counted in `progress` (a ProgressReporter) if given"""
+    # ENTITY Was Created
+    for entity in created_entities:
+        yield EntityCreated(entity["uuid"], entity["name"], get_entity_description(entity, session.index_b))
+        if progress is not None:
+            progress.advance(entity["name"])
+
+    # ENTITY Was Destroyed
+    for entity in destroyed_entities:
+        yield EntityDestroyed(entity["uuid"], entity["name"], get_entity_description(entity, session.index_a))
+        if progress is not None:
+            progress.advance(entity["name"])
+
+
+def iter_modifications(session: DiffSession, modified_entities: List[List[Dict]], progress=None):
+    """Yields the change records of every modified entity, entity by entity
+    Every entity done is counted in `progress` (a ProgressReporter) if given"""
+    # ENTITY Was changed/modification
+    for entity in modified_entities:
+        list_type_modification, nonlist_modification = find_changes_in_entities(session, entity)
+        yield from list_type_modification
+        yield from nonlist_modification
+        if progress is not None:
+            progress.advance(entity[0]["name"])
+
+
 def convert_difference_to_human_readable_text(
+    session: DiffSession,
     destroyed_entities: List[Dict],
     created_entities: List[Dict],
     modified_entities: List[List[Dict]],
-) -> tuple:
+    selection: str,
+    stream,
+    profile: Profile = None,
+    progress=None,
+):
     """
     convert_difference_to_human_readable_text
 
     This function takes in three lists of dictionaries: destroyed_entities, created_entities, and modified_entities.
-    It converts the differences between the entities in these lists into human-readable text.
-    The function returns a list of strings containing the text describing the differences.
+    It converts the differences between the entities in these lists into human-readable text,
+    and writes every table of the report (`selection`) to `stream` as soon as it is ready.
+    The summary of all events is stored in `session.summary`, the events and
+    modifications it counts in `session.events` and `session.*_modifications`.
+    Finding the changes and rendering the tables are recorded as stages of `profile`,
+    the entities done are reported to `progress` (see comparisonProgress).
     """
-    modified_entities_message = ""
-    created_entities_message = ""
-    destroyed_entities_message = ""
-    total_events = []
-    uuids = []; events = []
-    display_names = []
-    entity_names = []
+    created = []
+    destroyed = []
     list_type_modifications = []
     nonlist_modifications = []
+    rows = 0
 
-    # ENTITY Was Created
-    for entity in created_entities:
-        display_name = get_display_name(entity)
-        if display_name:
-            uuids.append(entity["uuid"])
-            events.append("created")
-            display_names.append(display_name)
-            entity_names.append(entity["name"])
-        else:
-            if entity["name"] in ['CCAsset', 'CCContentFilterAvailability', 'CCContentFilterLanguage',]: # Contains Description
-                display_name = get_attribute_in_entity('Description', entity)
-            elif entity["name"] in ['CCNotification']: # Contains 'AccessibilityText'
-                display_name = get_attribute_in_entity('AccessibilityText', entity)
+    progress = progressReporter(progress)
+    if progress is not None:
+        progress.begin("report", len(created_entities) + len(destroyed_entities) + len(modified_entities))
+
+    with profileStage(profile, "changes"):
+        for change in iter_entity_events(session, destroyed_entities, created_entities, progress):
+            if isinstance(change, EntityCreated):
+                created.append(change)
             else:
-                display_name = ''
-            uuids.append(entity["uuid"])
-            events.append("created")
-            display_names.append(display_name)
-            entity_names.append(entity["name"])
-
-    # Create Table for created entities
-    created_entities_message += Print_Entities_Tables(
-        entity_names, display_names, events, uuids
-    )
+                destroyed.append(change)
+
+    with profileStage(profile, "render"):
+        # Create Table for created entities, only the long report has them
+        if selection == '1':
+            rows += Print_Entities_Tables(created, stream)
+            stream.write('\n')
+
+        # Create Table for destroyed entities
+        rows += Print_Entities_Tables(destroyed, stream)
+        stream.write('\n')
+    total_events = created + destroyed # For the sake of summary, we need all events
+
+    with profileStage(profile, "changes"):
+        for change in iter_modifications(session, modified_entities, progress):
+            if isinstance(change, ListMembershipChanged):
+                list_type_modifications.append(change)
+            else:
+                nonlist_modifications.append(change)
 
-    #! Important
-    # Make sure the lists are empty again
-    total_events.extend(events) # For the sake of summary, we need all events
-    uuids = []; events = []
-    display_names = []
-    entity_names = []
+    with profileStage(profile, "render"):
+        # Send the session for the content filters exception
+        rows += Print_Entities_Changed_For_Lists_Tables(list_type_modifications, session, stream)
+        stream.write('\n')
 
-    # ENTITY Was Destroyed
-    for entity in destroyed_entities:
-        display_name = get_display_name(entity)
-        if display_name:
-            uuids.append(entity["uuid"])
-            events.append("destroyed")
-            display_names.append(display_name)
-            entity_names.append(entity["name"])
-        else:
-            if entity["name"] in ['CCAsset', 'CCContentFilterAvailability', 'CCContentFilterLanguage', ]: # Contains Description
-                display_name = get_attribute_in_entity('Description', entity)
-            elif entity["name"] in ['CCNotification']:                                                    # Contains AccessibilityText
-                display_name = get_attribute_in_entity('AccessibilityText', entity)
-            else:
-                display_name = ''
-            uuids.append(entity["uuid"])
-            events.append("destroyed")
-            display_names.append(display_name)
-            entity_names.append(entity["name"])
-
-    # Create Table for created entities
-    destroyed_entities_message += Print_Entities_Tables(
-        entity_names, display_names, events, uuids
-    )
-    total_events.extend(events) # For the sake of summary, we need all events
+        rows += Print_Entities_Changed_Tables(nonlist_modifications, stream)
+        stream.write('\n\n')
 
+    if profile is not None:
+        profile.count("rows_rendered", rows)
 
-    # ENTITY Was changed/modification
-    for entity in modified_entities:
-        list_type_modification, nonlist_modification = find_changes_in_entities(entity)
-        if list_type_modification:
-            for modification in list_type_modification:
-                list_type_modifications.append(modification)
-        if nonlist_modification:
-            nonlist_modifications.extend(nonlist_modification)
-                
-    # Send content_filters_a and content_filters_b for the exception
-    modified_entities_message += Print_Entities_Changed_For_Lists_Tables(list_type_modifications, content_filters_a_data,
-                                                content_filters_b_data, content_filters_region_a_data, content_filters_region_b_data)
-    modified_entities_message += '\n'
-
-    modified_entities_message += Print_Entities_Changed_Tables(nonlist_modifications)
-    modified_entities_message += '\n'
-    
-    global summary
-    summary = generate_summary(total_events, list_type_modifications, nonlist_modifications, 
-                                plist_entities_a['version'], plist_entities_b['version'])
-
-    return destroyed_entities_message, created_entities_message, modified_entities_message
-
-
-def print_entities(
-    destroyed_entities_message, created_entities_message, modified_entities_message,
-    selection=None
-    ):
-    """Prints the human readable messages about created entities, destroyed entities
-    and modified entities on the terminal"""
+    session.events = total_events
+    session.list_type_modifications = list_type_modifications
+    session.nonlist_modifications = nonlist_modifications
+    session.summary = generate_summary(total_events, list_type_modifications, nonlist_modifications,
+                                       session.version_a, session.version_b)
+    stream.write(session.summary + '\n')
+
+
+def ask_report_selection(selection=None):
+    """Returns the selected report, '1' for the long and '2' for the short one
+    Asks on the terminal until a valid selection is made"""
     if not selection:
-        selection = input("Select from the following Reports: [Full Dev Report => 1 | Consumer-Facing Report => 2] ")
-    if selection == '1':
-        # long report
-        print(created_entities_message)
-        print(destroyed_entities_message)
-        print(modified_entities_message)
-        print(summary)
-
-    elif selection == '2':
-        # short report
-        print(destroyed_entities_message)
-        print(modified_entities_message)
-        print(summary)
-        
-    else:
+        selection = input(REPORT_SELECTION_MESSAGE)
+    while selection not in REPORT_SELECTIONS:
         print("Invalid selection")
-        print_entities(
-            destroyed_entities_message, created_entities_message, modified_entities_message,
-            selection
-        )
+        selection = input(REPORT_SELECTION_MESSAGE)
+    return selection
+
+
+def write_report(session: DiffSession, selection=None, stream=None, profile: Profile = None, progress=None):
+    """Writes the report (`selection`, asked for if not given) of a comparison to
+    `stream` (stdout by default), table by table"""
+    if stream is None:
+        stream = sys.stdout
+    convert_difference_to_human_readable_text(
+        session,
+        session.destroyed_entities,
+        session.created_entities,
+        session.changed_entities,
+        ask_report_selection(selection),
+        stream,
+        profile,
+        progress,
+    )
+
+
+def write_jsonl(session: DiffSession, stream=None, progress=None):
+    """Writes every change of a comparison to `stream` (stdout by default) as a JSON object
+    on a line of its own, as soon as it is classified, followed by a summary object
+    The entities done are reported to `progress` (see comparisonProgress) if given.
+    Returns the counts of the summary"""
+    if stream is None:
+        stream = sys.stdout
+    progress = progressReporter(progress)
+    if progress is not None:
+        progress.begin("report", len(session.destroyed_entities) + len(session.created_entities)
+                       + len(session.changed_entities))
+    counts = new_summary_counts()
+    for change in iter_changes(
+        session, session.destroyed_entities, session.created_entities, session.changed_entities, progress
+    ):
+        count_change(counts, change)
+        stream.write(json.dumps(change.to_dict(), default=str) + "\n")
+
+    write_jsonl_summary(stream, "summary", counts, session.version_a, session.version_b)
+    return counts
+
+
+def write_jsonl_summary(stream, summary_type: str, counts: dict, catalog_a, catalog_b):
+    """Writes the JSON object equivalent to `generate_summary`"""
+    summary = {"type": summary_type, "catalog_a": catalog_a, "catalog_b": catalog_b}
+    summary.update(counts)
+    stream.write(json.dumps(summary, default=str) + "\n")
 
 
 def count_items_in_entity(entity: list):
@@ -424,139 +598,448 @@ def count_items_in_entity(entity: list):
     return count_a, count_b
 
 
-def get_attribute_in_entity(attribute: str, entity_item: list):
+def get_attribute_in_entity(attribute: str, entity_item: list, index: CatalogIndex = None):
     """
     This function takes an 'attribute' name as a string and a 'entity_item' as a list.
-    It will iterate through the attributes in the entity_item and if it finds a match for the attribute name,
-    it will return the value of that attribute. If no match is found, the function will return None.
+    It will look the attribute up in the entity's attribute map of `index`, the CatalogIndex
+    of the entity's catalog, and return the value of that attribute. Without an `index`, or
+    for an entity missing from it, the attributes in the entity_item are searched instead.
+    If no match is found, the function will return None.
     """
+    if index is not None:
+        attributes = index.attributes.get(entity_item["uuid"])
+        if attributes is not None:
+            return attributes.get(attribute)
+
     for attr in entity_item["attributes"]:
         if attr["name"] == attribute:
             return attr.get("value", '')
 
 
-def get_entities_data(plist_entities):
-    result = {}
-    for name, entity in plist_entities["entities"].items():
-        if name in ENTITIES_NAMES_KEYS:
-            for attr in entity:
-                result[attr["uuid"]] = attr
-
-    return result
-
-
-def get_entities_items_data(plist_entities):
-    result = {}
-    for name, entity in plist_entities["entities"].items():
-        if name in ENTITIES_ITEMS_NAMES_KEYS:
-            for attr in entity:
-                result[attr["uuid"]] = attr
-
-    return result
-
-
-def get_entities_collections_data(plist_entities):
-    result = {}
-    for name, entity in plist_entities["entities"].items():
-        if name in ENTITIES_COLLECTIONS_NAMES_KEYS:
-            for attr in entity:
-                result[attr["uuid"]] = attr
-
-    return result
-
-
-def get_assets_data(plist_entities: dict) -> dict:
-    """
-    Get assets from a plist.
-
-    This function takes plist entities (in the form of a dictionary) as input and returns a new dictionary containing all assets from the input,
-    with the asset's UUID as the key and the asset itself as the value.
-
-    Args:
-    plist_entities (dict): The input plist entities.
-
-    Returns:
-    dict: A dictionary containing all assets from the input.
-    """
-    return {asset["uuid"]: asset for asset in plist_entities["entities"]["CCAsset"]}
-
-
-def get_content_filters_language_data(plist_entities: dict) -> dict:
-    """Get CCContentFiltersLanguage from a plist."""
-    return {content_filter["uuid"]: content_filter for content_filter in plist_entities["entities"]["CCContentFilterLanguage"]}
-    
-
-def get_content_filters_region_data(plist_entities: dict) -> dict:
-    """Get CCContentFiltersRegion from a plist."""
-    return {content_filter["uuid"]: content_filter for content_filter in plist_entities["entities"]["CCContentFilterAvailability"]}
-    
-
-def compare_ccdoc(file_path_a, file_path_b, selection=None):
-    
-    global plist_entities_a, plist_entities_b
-    global entities_a, entities_b, entities_items_a, entities_items_b, assets_a, assets_b
-    global entities_collections_a, entities_collections_b
-    global content_filters_a_data, content_filters_b_data
-    global content_filters_region_a_data, content_filters_region_b_data
-
-    # Open both files and invoke diffing
-    with open(file_path_a, "rb") as file_a:
-        with open(file_path_b, "rb") as file_b:
-            plist_entities_a, plist_entities_b = plistlib.load(file_a), plistlib.load(
-                file_b
-            )
-
-            # Delete modified and metadataVersion
-            delete_unnecessary_attributes(plist_entities_a, plist_entities_b)
-
-            entities_items_a = get_entities_items_data(plist_entities_a)
-            entities_items_b = get_entities_items_data(plist_entities_b)
-
-            entities_a = get_entities_data(plist_entities_a)
-            entities_b = get_entities_data(plist_entities_b)
-
-            assets_a = get_assets_data(plist_entities_a)
-            assets_b = get_assets_data(plist_entities_b)
-
-            entities_collections_a = get_entities_collections_data(plist_entities_a)
-            entities_collections_b = get_entities_collections_data(plist_entities_b)
-
-            content_filters_a_data = get_content_filters_language_data(plist_entities_a)
-            content_filters_b_data = get_content_filters_language_data(plist_entities_b)
-
-            content_filters_region_a_data = get_content_filters_region_data(plist_entities_a)
-            content_filters_region_b_data = get_content_filters_region_data(plist_entities_b)
-
-
-            diffs = diffPlists(plist_entities_a, plist_entities_b)
-            destroyed_entity, created_entity, changed_entity = get_destroyed_created_and_changed_entities(diffs)
-            (
-                destroyed_entities_text,
-                created_entities_text,
-                modified_entities_text,
-            ) = convert_difference_to_human_readable_text(
-                destroyed_entity, created_entity, changed_entity
-            )
-            print_entities(
-                destroyed_entities_text, created_entities_text, modified_entities_text,
-                selection
-            )
-
+def load_catalog(file_path, profile: Profile = None):
+    """Loads a ccdoc file and indexes it, recording the stages in `profile` if given
+    Returns the plain plist, ready for diffing, and its CatalogIndex"""
+    with profileStage(profile, "parse"):
+        plist_entities = load_ccdoc(file_path)
+
+    with profileStage(profile, "index"):
+        index = indexCatalog(plist_entities)
+
+    # The diff doesn't care about modified and metadataVersion
+    with profileStage(profile, "prepare"):
+        delete_unnecessary_attributes(plist_entities)
+    return plist_entities, index
+
+
+def load(file_path, cache=None, profile: Profile = None):
+    """Loads and indexes a ccdoc file, through `cache` (a CatalogCache) if given"""
+    if cache is None:
+        return load_catalog(file_path, profile)
+    if profile is None:
+        return cache.load(file_path, load_catalog)
+
+    # The same as cache.load, with the cache's own work recorded as well
+    with profile.stage("cache read"):
+        entry = cache.entryPath(cache.key(file_path))
+        catalog = cache.read(entry)
+    if catalog is None:
+        profile.add("cache_misses", 1)
+        catalog = load_catalog(file_path, profile)
+        with profile.stage("cache write"):
+            cache.store(entry, catalog)
+    return catalog
+
+
+def build_catalog(file_path, cache=None, entry=None):
+    """Loads and indexes a ccdoc file, and stores it in `cache` under `entry` if given
+    Runs in the worker processes of `load_concurrently`, which already hashed the file"""
+    catalog = load_catalog(file_path)
+    if cache is not None:
+        cache.store(entry, catalog)
+    return catalog
+
+
+def read_or_build(file_path, cache=None, entry=None):
+    """Reads the catalog of a ccdoc file from its `entry` in `cache`, builds it if it isn't there"""
+    catalog = None
+    if cache is not None:
+        catalog = cache.read(entry)
+    if catalog is None:
+        catalog = build_catalog(file_path, cache, entry)
+    return catalog
+
+
+def load_concurrently(file_paths, cache=None, executor=None):
+    """Loads and indexes several ccdoc files at the same time
+    Files missing from `cache` are parsed in processes of their own, on `executor`
+    (a ProcessPoolExecutor) if given, so parsing isn't serialized by the GIL.
+    Cached catalogs are read in this process meanwhile. Every file is hashed once.
+    Returns the catalogs in the order of `file_paths`"""
+    entries = [None] * len(file_paths)
+    if cache is not None:
+        entries = [cache.entryPath(cache.key(file_path)) for file_path in file_paths]
+    missing = [i for i, entry in enumerate(entries) if entry is None or not os.path.isfile(entry)]
+
+    # Nothing to parse or a single file, other processes wouldn't gain anything
+    if len(file_paths) < 2 or not missing:
+        return [read_or_build(file_path, cache, entry) for file_path, entry in zip(file_paths, entries)]
+
+    catalogs = [None] * len(file_paths)
+    own_executor = executor is None
+    if own_executor:
+        executor = ProcessPoolExecutor(len(missing))
+    try:
+        futures = {i: executor.submit(build_catalog, file_paths[i], cache, entries[i]) for i in missing}
+        for i, file_path in enumerate(file_paths):
+            if i not in futures:
+                # Built again if it was removed or broken since
+                catalogs[i] = read_or_build(file_path, cache, entries[i])
+        for i, future in futures.items():
+            catalogs[i] = future.result()
+    finally:
+        if own_executor:
+            executor.shutdown()
+    return catalogs
+
+
+def compare_catalogs(catalog_a, catalog_b, executor=None, profile: Profile = None, progress=None):
+    """Compares two loaded catalogs
+    The diff and classification of every entity type is run on `executor`
+    (a ProcessPoolExecutor) if given, both are recorded in `profile` if given
+    and reported to `progress` (see comparisonProgress) while they run.
+    Returns the DiffSession holding everything the comparison produced"""
+    session = DiffSession(catalog_a, catalog_b)
+    progress = progressReporter(progress)
+
+    with profileStage(profile, "diff"):
+        if executor is None:
+            session.diffs = diffPlists(session.plist_a, session.plist_b, progress)
+            classified = None
+        else:
+            session.diffs, classified = diff_in_parallel(session.plist_a, session.plist_b, executor, progress)
+    with profileStage(profile, "classify"):
+        (
+            session.destroyed_entities,
+            session.created_entities,
+            session.changed_entities,
+        ) = get_destroyed_created_and_changed_entities(session.diffs, classified, progress)
+    return session
+
+
+def count_session(profile: Profile, session: DiffSession):
+    """Records the sizes of the catalogs and of the diff of a comparison in `profile`"""
+    for side, plist in (("a", session.plist_a), ("b", session.plist_b)):
+        profile.count(f"entities_{side}", {name: len(entities) for name, entities in plist["entities"].items()})
+    profile.count("diff_paths", len(session.diffs))
+    profile.count("diff_entries", sum(len(entries) for entries in session.diffs.values()))
+    profile.count("destroyed_entities", len(session.destroyed_entities))
+    profile.count("created_entities", len(session.created_entities))
+    profile.count("changed_entities", len(session.changed_entities))
+
+
+def compare_ccdoc(file_path_a, file_path_b, selection=None, cache=None, executor=None,
+                  output_format=TABLE_FORMAT, stream=None, profile: Profile = None, progress=None,
+                  load_in_processes=True):
+    """Compares two ccdoc files and writes the report, tables or JSON Lines (`output_format`),
+    to `stream` (stdout by default)
+    Both files are loaded at the same time in processes of their own, unless
+    `load_in_processes` is false, parsed catalogs are taken from and stored in
+    `cache` (a CatalogCache) if given. Loading and the diff are spread over
+    `executor` if given. With a `profile` (a Profile) every stage is recorded
+    in it, and both files are loaded in this process one after the other.
+    Every stage is reported to `progress` (see comparisonProgress) while it runs,
+    which raises ComparisonCancelled once it asks to stop.
+    Returns the DiffSession holding everything the comparison produced"""
+    progress = progressReporter(progress)
+    if progress is not None:
+        progress.begin("load")
+    if profile is None and load_in_processes:
+        catalog_a, catalog_b = load_concurrently([file_path_a, file_path_b], cache, executor)
+    else:
+        catalog_a, catalog_b = load(file_path_a, cache, profile), load(file_path_b, cache, profile)
+    session = compare_catalogs(catalog_a, catalog_b, executor, profile, progress)
+    if profile is not None:
+        count_session(profile, session)
+
+    if output_format == JSONL_FORMAT:
+        with profileStage(profile, "jsonl"):
+            write_jsonl(session, stream, progress)
+        return session
+
+    write_report(session, selection, stream, profile, progress)
+    return session
+
+
+def compare_chain(file_paths, selection=None, cache=None, executor=None, output_format=TABLE_FORMAT,
+                  stream=None):
+    """Compares a series of ccdoc files, each one against the next one
+    Only two catalogs are held at a time and every file is loaded and indexed
+    exactly once. Writes one report per pair and a combined summary to `stream`
+    (stdout by default)"""
+    if stream is None:
+        stream = sys.stdout
+    if output_format == TABLE_FORMAT:
+        selection = ask_report_selection(selection)
+
+    events = []
+    list_type_modifications = []
+    nonlist_modifications = []
+    counts = new_summary_counts()
+
+    catalog_b = load(file_paths[0], cache)
+    first_version = catalog_b[0].get("version")
+    for file_path in file_paths[1:]:
+        # Slide the window, the newer catalog becomes the older one
+        catalog_a, catalog_b = catalog_b, load(file_path, cache)
+        session = compare_catalogs(catalog_a, catalog_b, executor)
+        if output_format == JSONL_FORMAT:
+            for key, count in write_jsonl(session, stream).items():
+                counts[key] += count
+            continue
+
+        write_report(session, selection, stream)
+
+        events.extend(session.events)
+        list_type_modifications.extend(session.list_type_modifications)
+        nonlist_modifications.extend(session.nonlist_modifications)
+
+    if output_format == JSONL_FORMAT:
+        write_jsonl_summary(stream, "combined_summary", counts, first_version, session.version_b)
+        return
+
+    stream.write("Combined summary of all comparisons\n")
+    stream.write(generate_summary(events, list_type_modifications, nonlist_modifications,
+                                  first_version, session.version_b) + "\n")
+
+
+def compare_pair(file_path_a, file_path_b, report_path, selection, output_format=TABLE_FORMAT, cache=None):
+    """Compares two ccdoc files of a batch and writes the report to `report_path`
+    Runs in a worker of the batch, errors are recorded instead of raised so one
+    broken pair doesn't stop the others.
+    Returns the entry of the pair in the batch index"""
+    entry = {"a": file_path_a, "b": file_path_b}
+    try:
+        os.makedirs(os.path.dirname(report_path), exist_ok=True)
+        # The pairs of the batch are compared in parallel already
+        catalog_a, catalog_b = load(file_path_a, cache), load(file_path_b, cache)
+        session = compare_catalogs(catalog_a, catalog_b)
+        with open(report_path, "w", encoding="utf-8") as stream:
+            if output_format == JSONL_FORMAT:
+                counts = write_jsonl(session, stream)
+            else:
+                write_report(session, selection, stream)
+                counts = count_changes(session.events, session.list_type_modifications,
+                                       session.nonlist_modifications)
+    except Exception as error:
+        entry["error"] = f"{type(error).__name__}: {error}"
+        return entry
+
+    entry["version_a"] = session.version_a
+    entry["version_b"] = session.version_b
+    entry.update(counts)
+    return entry
+
+
+def compare_batch(dir_a, dir_b, output_dir, selection=BATCH_REPORT_SELECTION, cache=None, jobs=1,
+                  output_format=TABLE_FORMAT, stream=None):
+    """Compares every catalog of `dir_a` against the one with the same relative path in `dir_b`
+    Nothing is asked for, every pair's report (`selection`) is written to a file of its own below
+    `output_dir`, `jobs` pairs at a time, and an index of all of them to BATCH_INDEX_NAME.
+    Progress is written to `stream` (stdout by default).
+    Returns the index"""
+    if stream is None:
+        stream = sys.stdout
+    pairs, only_a, only_b = pairCatalogs(dir_a, dir_b)
+
+    # Fail before comparing anything
+    for path in pairs:
+        validatePath(os.path.join(dir_a, path))
+        validatePath(os.path.join(dir_b, path))
+
+    extension = ".jsonl" if output_format == JSONL_FORMAT else ".txt"
+    arguments = [
+        (os.path.join(dir_a, path), os.path.join(dir_b, path),
+         os.path.join(output_dir, path + extension), selection, output_format, cache)
+        for path in pairs
+    ]
+
+    def progress(path, entry):
+        status = entry.get("error", "compared")
+        stream.write(f"{path}: {status}\n")
+        stream.flush()
+
+    entries = [None] * len(pairs)
+    if jobs > 1 and len(pairs) > 1:
+        with ProcessPoolExecutor(min(jobs, len(pairs))) as executor:
+            futures = {executor.submit(compare_pair, *args): i for i, args in enumerate(arguments)}
+            for future in as_completed(futures):
+                i = futures[future]
+                entries[i] = future.result()
+                progress(pairs[i], entries[i])
+    else:
+        for i, args in enumerate(arguments):
+            entries[i] = compare_pair(*args)
+            progress(pairs[i], entries[i])
+
+    totals = new_summary_counts()
+    for i, (path, args) in enumerate(zip(pairs, arguments)):
+        failed = "error" in entries[i]
+        report = None if failed else os.path.relpath(args[2], output_dir)
+        entries[i] = {"path": path, "report": report, **entries[i]}
+        if not failed:
+            for key in totals:
+                totals[key] += entries[i][key]
+
+    index = {
+        "dir_a": dir_a,
+        "dir_b": dir_b,
+        "format": output_format,
+        "selection": selection,
+        "pairs": entries,
+        "failed": sum(1 for entry in entries if "error" in entry),
+        "only_in_a": only_a,
+        "only_in_b": only_b,
+        "totals": totals,
+    }
+    os.makedirs(output_dir, exist_ok=True)
+    with open(os.path.join(output_dir, BATCH_INDEX_NAME), "w", encoding="utf-8") as file:
+        json.dump(index, file, indent=2, default=str)
+    stream.write(f"{len(pairs) - index['failed']} of {len(pairs)} pairs compared, "
+                 f"{len(only_a) + len(only_b)} files without a counterpart, "
+                 f"index written to {os.path.join(output_dir, BATCH_INDEX_NAME)}\n")
+    return index
 
 
 def main():
     """Main entry-point of the program"""
     # Parse required and optional arguments
     parser = argparse.ArgumentParser()
-    parser.add_argument("-a", dest="a", help="Absolute path to file A", required=True)
-    parser.add_argument("-b", dest="b", help="Absolute path to file B", required=True)
+    parser.add_argument("-a", dest="a", help="Absolute path to file A")
+    parser.add_argument("-b", dest="b", help="Absolute path to file B")
+    parser.add_argument("--chain", dest="chain", nargs="+", metavar="FILE",
+                        help="Compare each file against the next one, oldest first")
+    parser.add_argument("--batch", dest="batch", nargs=2, metavar=("DIR_A", "DIR_B"),
+                        help="Compare every catalog of DIR_A against the one with the same relative path in DIR_B")
+    parser.add_argument("--output-dir", dest="output_dir",
+                        help="Directory of the batch reports and their index")
+    parser.add_argument("--report", dest="selection", choices=REPORT_SELECTIONS,
+                        help="Report to write without asking, 1 for the full dev report, 2 for the consumer-facing one")
+    parser.add_argument("--cache-dir", dest="cache_dir", default=DEFAULT_CACHE_DIR,
+                        help="Directory of the parsed catalog cache")
+    parser.add_argument("--cache-size", dest="cache_size", type=int, default=DEFAULT_MAX_BYTES // (1024 * 1024),
+                        help="Size limit of the parsed catalog cache in MB")
+    parser.add_argument("--no-cache", dest="no_cache", action="store_true",
+                        help="Always parse both files, don't use the catalog cache")
+    parser.add_argument("--format", dest="output_format", choices=OUTPUT_FORMATS, default=TABLE_FORMAT,
+                        help="Report as tables, or as one JSON object per line for other programs")
+    parser.add_argument("--jobs", dest="jobs", type=int, default=1,
+                        help="Number of processes diffing the entity types in parallel, "
+                             "or comparing pairs in parallel with --batch")
+    parser.add_argument("-o", "--output", dest="output",
+                        help="Write the report to this file instead of stdout")
+    parser.add_argument("--profile", dest="profile", nargs="?", const="-", metavar="FILE",
+                        help="Record time and memory of every stage, written as JSON to FILE or stderr")
+    parser.add_argument("--profile-diff", dest="profile_diff", metavar="FILE",
+                        help="Dump cProfile statistics of the diff to FILE, implies --profile")
+    parser.add_argument("--progress", dest="progress", action="store_true",
+                        help="Show the progress of every stage on stderr")
     args = parser.parse_args()
 
-    validatePath(args.a)
-    validatePath(args.b)
+    if args.batch:
+        if args.a or args.b or args.chain:
+            parser.error("--batch can't be combined with -a, -b and --chain")
+        if not args.output_dir:
+            parser.error("--batch needs --output-dir")
+        if args.output:
+            parser.error("--batch writes its reports to --output-dir, not --output")
+        for directory in args.batch:
+            if not os.path.isdir(directory):
+                parser.error(f'The directory "{directory}" does not exist!')
+        file_paths = []
+    elif args.chain:
+        if args.a or args.b:
+            parser.error("--chain can't be combined with -a and -b")
+        if len(args.chain) < 2:
+            parser.error("--chain needs at least two files")
+        file_paths = args.chain
+    elif args.a and args.b:
+        file_paths = [args.a, args.b]
+    else:
+        parser.error("either -a and -b, --chain or --batch are required")
+
+    if args.jobs < 1:
+        parser.error("--jobs has to be at least 1")
+
+    profile = None
+    if args.profile or args.profile_diff:
+        if args.chain or args.batch:
+            parser.error("--profile only works with -a and -b")
+        profile = Profile({"diff": args.profile_diff} if args.profile_diff else None)
+
+    progress = None
+    if args.progress:
+        if args.chain or args.batch:
+            parser.error("--progress only works with -a and -b")
+        if args.output_format == TABLE_FORMAT:
+            # Asked up front, the progress bar would run into the question
+            args.selection = ask_report_selection(args.selection)
+        progress = ProgressBar(sys.stderr)
+
+    for file_path in file_paths:
+        validatePath(file_path)
+
+    cache = None
+    if not args.no_cache:
+        cache = CatalogCache(args.cache_dir, args.cache_size * 1024 * 1024, CATALOG_VERSION)
+
+    if args.batch:
+        index = compare_batch(*args.batch, args.output_dir, args.selection or BATCH_REPORT_SELECTION,
+                              cache, args.jobs, args.output_format)
+        # Let automation tell a broken run from a good one
+        if index["failed"]:
+            sys.exit(1)
+        return
+
+    stream = sys.stdout
+    if args.output:
+        try:
+            stream = open(args.output, "w", encoding="utf-8")
+        except OSError as error:
+            parser.error(f"can't write to {args.output}: {error.strerror}")
+
+    executor = None
+    if args.jobs > 1:
+        executor = ProcessPoolExecutor(args.jobs)
+
+    try:
+        if args.chain:
+            compare_chain(file_paths, args.selection, cache, executor, args.output_format, stream)
+        else:
+            compare_ccdoc(args.a, args.b, args.selection, cache, executor, args.output_format, stream,
+                          profile, progress)
+    finally:
+        if progress is not None:
+            progress.close()
+        if stream is not sys.stdout:
+            stream.close()
+        if executor is not None:
+            executor.shutdown()
+
+    if profile is not None:
+        write_profile(profile, args.profile)
+
 
-    compare_ccdoc(args.a, args.b)
+def write_profile(profile: Profile, file_path=None):
+    """Writes a profile as JSON to a file, or to stderr without one (or with "-")"""
+    if not file_path or file_path == "-":
+        profile.write(sys.stderr)
+        return
+    with open(file_path, "w", encoding="utf-8") as file:
+        profile.write(file)
 
 
 if __name__ == "__main__":
+    # Only does anything in a frozen Windows executable, where the worker
+    # processes of --jobs are started through it
+    freeze_support()
     main()
@@ -0,0 +1,94 @@
+#!python3
+"""Per-stage timings and memory peaks of a comparison
+
+A Profile is handed through the pipeline of a comparison. Every stage runs
+inside `profile.stage(name)`, which records its wall time, the CPU time of
+this process and the peak of the memory traced by tracemalloc while it ran.
+Stages of the same name, like parsing both catalogs, are added up. Counts of
+what the stages produced are recorded next to them, and the whole profile is
+written as JSON.
+
+Stages don't nest, and work done in other processes (see --jobs) only shows
+in the wall time. Tracing memory slows everything down noticeably."""
+import cProfile
+import json
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+
+
+def profileStage(profile, name):
+    """`profile.stage(name)`, or a context doing nothing without a profile"""
+    if profile is None:
+        return nullcontext()
+    return profile.stage(name)
+
+
+class Profile:
+    """Timings, memory peaks and counts of the stages of a comparison
+
+    `cprofile` maps stage names to paths, cProfile statistics of these
+    stages are dumped there (e.g. {"diff": "diff.prof"})."""
+
+    def __init__(self, cprofile=None):
+        self.stages = {}
+        self.counts = {}
+        self.cprofile = cprofile or {}
+
+    @contextmanager
+    def stage(self, name):
+        """Record the stage running inside the with block"""
+        ownTracing = not tracemalloc.is_tracing()
+        if ownTracing:
+            tracemalloc.start()
+        startMemory = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+
+        profiler = None
+        if name in self.cprofile:
+            profiler = cProfile.Profile()
+            profiler.enable()
+        wall = time.perf_counter()
+        cpu = time.process_time()
+        try:
+            yield
+        finally:
+            wall = time.perf_counter() - wall
+            cpu = time.process_time() - cpu
+            if profiler is not None:
+                profiler.disable()
+                profiler.dump_stats(self.cprofile[name])
+            peak = tracemalloc.get_traced_memory()[1] - startMemory
+            if ownTracing:
+                tracemalloc.stop()
+
+            record = self.stages.setdefault(
+                name, {"calls": 0, "wall_seconds": 0.0, "cpu_seconds": 0.0, "memory_peak_bytes": 0}
+            )
+            record["calls"] += 1
+            record["wall_seconds"] += wall
+            record["cpu_seconds"] += cpu
+            record["memory_peak_bytes"] = max(record["memory_peak_bytes"], peak)
+
+    def count(self, name, value):
+        """Record a count, anything JSON can hold"""
+        self.counts[name] = value
+
+    def add(self, name, value):
+        """Add to a numeric count"""
+        self.counts[name] = self.counts.get(name, 0) + value
+
+    def to_dict(self):
+        return {
+            "stages": self.stages,
+            "total": {
+                "wall_seconds": sum(stage["wall_seconds"] for stage in self.stages.values()),
+                "cpu_seconds": sum(stage["cpu_seconds"] for stage in self.stages.values()),
+            },
+            "counts": self.counts,
+        }
+
+    def write(self, stream):
+        """Write the profile as JSON"""
+        json.dump(self.to_dict(), stream, indent=2, default=str)
+        stream.write("\n")
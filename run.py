@@ -1,15 +1,61 @@
 from PyQt5.QtWidgets import *
 from PyQt5.QtGui import *
 from PyQt5.QtCore import *
-from main import compare_ccdoc
+from main import compare_ccdoc, write_profile
+from catalogCache import CatalogCache
+from comparisonProgress import ComparisonCancelled
+from constants import CATALOG_VERSION, COMPARISON_STAGES
 from design import Ui_MainWindow
-from threading import Thread
+from pipelineProfile import Profile
+from io import StringIO
+from threading import Event
+
+
+class ComparisonWorker(QObject):
+    """Compares two ccdoc files on the thread it was moved to
+    Reports its progress through `progressed` (stage, entity type, done and total,
+    empty and 0 if unknown) and ends with exactly one of `finished` (with the report),
+    `failed` (with the error) or `cancelled`."""
+    progressed = pyqtSignal(str, str, int, int)
+    finished = pyqtSignal(str)
+    failed = pyqtSignal(str)
+    cancelled = pyqtSignal()
+
+    def __init__(self, oldPlist, newPlist, selection, cache=None, profile=None) -> None:
+        super().__init__()
+        self.oldPlist = oldPlist
+        self.newPlist = newPlist
+        self.selection = selection
+        self.cache = cache
+        self.profile = profile
+        self.cancelRequested = Event()
+
+    def cancel(self):
+        """Stop the comparison at its next progress report, safe to call from any thread"""
+        self.cancelRequested.set()
+
+    def reportProgress(self, stage, entity_type=None, done=None, total=None):
+        self.progressed.emit(stage, entity_type or "", done or 0, total or 0)
+        return self.cancelRequested.is_set()
+
+    def run(self):
+        report = StringIO()
+        try:
+            # Loaded in this process, so the bundled app never starts worker processes
+            compare_ccdoc(self.oldPlist, self.newPlist, self.selection, self.cache, stream=report,
+                          profile=self.profile, progress=self.reportProgress, load_in_processes=False)
+        except ComparisonCancelled:
+            self.cancelled.emit()
+        except Exception as error:
+            self.failed.emit(f"{type(error).__name__}: {error}")
+        else:
+            self.finished.emit(report.getvalue())
 
 
 class MainWindow(QMainWindow):
     oldPlist = newPlist = None
 
-    def __init__(self) -> None:
+    def __init__(self, profile_path=None) -> None:
         super().__init__()
         self.ui = Ui_MainWindow()
         self.ui.setupUi(self)
@@ -18,9 +64,18 @@ class MainWindow(QMainWindow):
         self.ui.selectOldPlistButton.clicked.connect(self.openOldPlistFileDialog)
         self.ui.selectNewPlistButton.clicked.connect(self.openNewPlistFileDialog)
         self.ui.runButton.clicked.connect(self.run)
+        self.ui.cancelButton.clicked.connect(self.cancel)
         self.ui.consumerRadioButton.setChecked(True)
+        # A hundred steps for every stage
+        self.ui.progressBar.setRange(0, len(COMPARISON_STAGES) * 100)
+        # Parsed catalogs, so comparing against the same baseline again is quick
+        self.cache = CatalogCache(version=CATALOG_VERSION)
+        # Where the profile of every comparison is written, see --profile
+        self.profile_path = profile_path
+        # The running comparison, if any
+        self.comparisonThread = self.worker = self.profile = None
+
 
-        
     def openOldPlistFileDialog(self):
         """Open a window so the user can select a document file
         It sets `oldPlist` variable to the path of docs."""
@@ -40,24 +95,105 @@ class MainWindow(QMainWindow):
             self.ui.newLineEdit.setText(self.newPlist)
 
     def run(self):
+        """Start comparing the selected files on a thread of its own
+        The window stays responsive, the report is shown once it's ready."""
+        if self.comparisonThread is not None:
+            return
         if self.ui.fullDevRadioButton.isChecked():
             selection = '1'
         else:
             selection = '2'
-        if self.oldPlist and self.newPlist:
-            thread = Thread(target=compare_ccdoc, args=(self.oldPlist, self.newPlist), 
-                            kwargs={'selection': selection}
-                            )
-            thread.start()
-            thread.join()
-        else:
+        if not (self.oldPlist and self.newPlist):
             print("Please provide old and new ccodoc/plist")
+            return
+
+        self.profile = Profile() if self.profile_path else None
+        self.worker = ComparisonWorker(self.oldPlist, self.newPlist, selection, self.cache, self.profile)
+        self.comparisonThread = QThread(self)
+        self.worker.moveToThread(self.comparisonThread)
+        self.comparisonThread.started.connect(self.worker.run)
+        self.worker.progressed.connect(self.showProgress)
+        self.worker.finished.connect(self.showReport)
+        self.worker.failed.connect(self.showError)
+        self.worker.cancelled.connect(self.showCancelled)
+        for signal in (self.worker.finished, self.worker.failed, self.worker.cancelled):
+            signal.connect(self.comparisonThread.quit)
+        self.comparisonThread.finished.connect(self.comparisonDone)
+
+        self.setRunning(True)
+        self.comparisonThread.start()
+
+    def cancel(self):
+        """Ask the running comparison to stop"""
+        if self.worker is not None:
+            # Called directly, the worker's thread is busy with the comparison
+            self.worker.cancel()
+            self.ui.cancelButton.setEnabled(False)
+            self.ui.progressBar.setFormat("Cancelling...")
+
+    def setRunning(self, running):
+        """Switch the controls between a running comparison and an idle window"""
+        for widget in (self.ui.runButton, self.ui.selectOldPlistButton, self.ui.selectNewPlistButton,
+                       self.ui.oldLineEdit, self.ui.newLineEdit, self.ui.frame):
+            widget.setEnabled(not running)
+        self.ui.cancelButton.setEnabled(running)
+        if running:
+            self.ui.progressBar.setValue(0)
+            self.ui.progressBar.setFormat("Starting...")
+
+    def showProgress(self, stage, entity_type, done, total):
+        if not self.ui.cancelButton.isEnabled():
+            # Cancelling, keep saying so
+            return
+        value = COMPARISON_STAGES.index(stage) * 100
+        if total:
+            value += min(done, total) * 100 // total
+        label = stage.capitalize()
+        if entity_type:
+            label += f" {entity_type}"
+        self.ui.progressBar.setValue(value)
+        self.ui.progressBar.setFormat(f"{label}...")
+
+    def showReport(self, report):
+        self.ui.progressBar.setValue(len(COMPARISON_STAGES) * 100)
+        self.ui.progressBar.setFormat("Done")
+        self.ui.textBrowser.setFont(QFontDatabase.systemFont(QFontDatabase.FixedFont))
+        self.ui.textBrowser.setPlainText(report)
+
+    def showError(self, message):
+        self.ui.progressBar.setFormat("Failed")
+        QMessageBox.critical(self, "Comparison failed", message)
+
+    def showCancelled(self):
+        self.ui.progressBar.setValue(0)
+        self.ui.progressBar.setFormat("Cancelled")
+
+    def comparisonDone(self):
+        """Clean up after the comparison's thread stopped"""
+        if self.profile is not None:
+            write_profile(self.profile, self.profile_path)
+        self.worker.deleteLater()
+        self.comparisonThread.deleteLater()
+        self.comparisonThread = self.worker = self.profile = None
+        self.setRunning(False)
+
+    def closeEvent(self, event):
+        """Stop a running comparison before the window goes away"""
+        if self.comparisonThread is not None:
+            self.worker.cancel()
+            self.comparisonThread.wait()
+        super().closeEvent(event)
 
 
 
 if __name__ == '__main__':
+    import argparse
     import sys
-    app = QApplication(sys.argv)
-    window  = MainWindow()
+    parser = argparse.ArgumentParser(description="Compare two ccdoc files in a window")
+    parser.add_argument("--profile", dest="profile", nargs="?", const="-", metavar="FILE",
+                        help="Record time and memory of every stage of a comparison, written as JSON to FILE or stderr")
+    # Everything else is for Qt
+    args, qt_args = parser.parse_known_args()
+    app = QApplication(sys.argv[:1] + qt_args)
+    window  = MainWindow(args.profile)
     sys.exit(app.exec_())
-
@@ -1,7 +1,7 @@
 from setuptools import setup
 
 APP = ['run.py']
-OPTIONS = {'includes': ['colorclass', 'terminaltables']}
+OPTIONS = {}
 
 setup(
     app=APP,
@@ -0,0 +1,245 @@
+#!python3
+"""Tables in the layout of terminaltables' SingleTable, built line by line
+
+Colors and line drawing characters are only used when writing to a
+terminal, anywhere else the table is drawn with plain ASCII characters."""
+import re
+import sys
+import unicodedata
+from typing import NamedTuple
+
+ANSI_PATTERN = re.compile(r"\033\[[\d;]+m")
+
+COLOR_CODES = {
+    "autogreen": "\033[92m",
+    "autored": "\033[91m",
+    "autoblue": "\033[94m",
+    "green": "\033[32m",
+    "red": "\033[31m",
+    "blue": "\033[34m",
+    "magenta": "\033[35m",
+}
+COLOR_RESET = "\033[39m"
+
+# Switch to and back from the DEC line drawing character set
+LINE_DRAWING = "\033(0"
+LINE_DRAWING_END = "\033(B"
+
+# Borders as line drawing characters: left, horizontal, intersect and right
+TOP = "lqwk"
+MIDDLE = "tqnu"
+BOTTOM = "mqvj"
+VERTICAL = "x"
+ASCII_BORDERS = str.maketrans("lqwktnumvjx", "+-+++++++" + "+|")
+
+# SingleTable counts the escape sequences of an intersect into the width
+# available for a title, so does Table to hide the same titles
+TITLE_INTERSECT_WIDTH = len(LINE_DRAWING + "w" + LINE_DRAWING_END)
+
+# None decides by whether the output is a terminal, see setColor
+useColors = None
+
+
+class Colored(NamedTuple):
+    """A cell drawn in one of COLOR_CODES on a terminal"""
+
+    text: str
+    color: str
+
+
+def setColor(enabled):
+    """Force colors and line drawing on or off, None decides by the output being a terminal"""
+    global useColors
+    useColors = enabled
+
+
+def colorEnabled(stream=None):
+    """Whether tables written to `stream` (stdout by default) are drawn with
+    colors and line drawing characters"""
+    if useColors is not None:
+        return useColors
+    if stream is None:
+        stream = sys.stdout
+    try:
+        return stream.isatty()
+    except (AttributeError, ValueError):
+        return False
+
+
+def visibleWidth(text):
+    """Number of columns a string takes on a terminal, wide characters take two"""
+    if "\033" in text:
+        text = ANSI_PATTERN.sub("", text)
+    if text.isascii():
+        return len(text)
+    return sum(
+        2 if unicodedata.east_asian_width(char) in ("F", "W") else 1 for char in text
+    )
+
+
+class Table:
+    """Table with a title in its top border and a border around every cell
+
+    Takes the attributes of SingleTable which are used here, cells are plain
+    strings (or anything turning into one) and Colored."""
+
+    def __init__(self, table_data, title=None):
+        self.table_data = table_data
+        self.title = title
+        self.inner_row_border = False
+        self.justify_columns = {}
+
+    @property
+    def table(self):
+        """The whole table as one string, without a trailing newline"""
+        return "\n".join(self.lines())
+
+    def write(self, stream, color=None):
+        """Write the table to `stream` line by line, without a trailing newline
+
+        `color` defaults to whether `stream` is a terminal."""
+        if color is None:
+            color = colorEnabled(stream)
+        lines = self.lines(color)
+        stream.write(next(lines))
+        for line in lines:
+            stream.write("\n" + line)
+
+    def lines(self, color=None):
+        """Yield the table line by line
+
+        `color` draws colors and line drawing characters, by default only
+        when stdout is a terminal."""
+        if color is None:
+            color = colorEnabled()
+
+        # Split every cell into lines and measure it, all in one pass
+        rows = []
+        widths = []
+        for row in self.table_data:
+            cells = []
+            height = 1
+            for column, cell in enumerate(row):
+                code = None
+                if isinstance(cell, Colored):
+                    cell, code = cell.text, COLOR_CODES[cell.color]
+                if not isinstance(cell, str):
+                    cell = str(cell)
+
+                lines = cell.splitlines() or [""]
+                cells.append((lines, code))
+
+                if column == len(widths):
+                    widths.append(0)
+                if cell:
+                    width = max(visibleWidth(line) for line in lines)
+                    if width > widths[column]:
+                        widths[column] = width
+                    if len(lines) > height:
+                        height = len(lines)
+                # SingleTable draws as many lines as the first cell has, counting an
+                # empty line after a trailing newline. Other cells don't get that line
+                if column == 0 and cell.endswith("\n") and len(lines) + 1 > height:
+                    height = len(lines) + 1
+            rows.append((cells, height))
+
+        encode = self._lineDrawing if color else self._ascii
+        vertical = encode(VERTICAL)
+        middle = encode(self._border(MIDDLE, widths))
+
+        yield encode(self._border(TOP, widths), self.title)
+        last = len(rows) - 1
+        for index, (cells, height) in enumerate(rows):
+            # Missing cells are empty
+            cells = cells + [([""], None)] * (len(widths) - len(cells))
+            for lineNumber in range(height):
+                yield vertical + vertical.join(
+                    self._pad(cells[column], lineNumber, widths[column], column, color)
+                    for column in range(len(widths))
+                ) + vertical
+            if index != last and (index == 0 or self.inner_row_border):
+                yield middle
+        yield encode(self._border(BOTTOM, widths))
+
+    def _pad(self, cell, lineNumber, width, column, color):
+        """A line of a cell, aligned and padded to the column's width"""
+        lines, code = cell
+        line = lines[lineNumber] if lineNumber < len(lines) else ""
+        margin = width - visibleWidth(line)
+
+        justify = self.justify_columns.get(column)
+        if justify == "center":
+            # The same split as str.center
+            total = margin + len(line)
+            left = margin // 2 + (margin & total & 1)
+        elif justify == "right":
+            left = margin
+        else:
+            left = 0
+
+        if code is not None and color and line:
+            line = code + line + COLOR_RESET
+        return " " * (left + 1) + line + " " * (margin - left + 1)
+
+    def _border(self, chars, widths):
+        """A horizontal border as line drawing characters: left, columns, intersect and right"""
+        left, horizontal, intersect, right = chars
+        return left, [horizontal * (width + 2) for width in widths], intersect, right
+
+    def _placeTitle(self, border, title):
+        """Split the top border around the title like SingleTable
+
+        Returns the border before and after the title, or None if the title
+        doesn't fit."""
+        left, columns, intersect, right = border
+        length = visibleWidth(title)
+        widths = [len(column) for column in columns]
+        if length > sum(widths) + TITLE_INTERSECT_WIDTH * (len(widths) - 1):
+            return None
+
+        if length <= widths[0]:
+            after = columns[0][length:] + "".join(
+                intersect + column for column in columns[1:]
+            )
+            return left, after + right
+
+        # The title covers some columns and intersects
+        after = ""
+        for index, width in enumerate(widths):
+            if index:
+                # An intersect before this column
+                if length < 1:
+                    after += intersect
+                elif length == 1:
+                    length = 0
+                else:
+                    length -= 1
+            if length < 1:
+                after += columns[index]
+            elif width >= length:
+                after += columns[index][length:]
+                length = 0
+            else:
+                length -= width
+        return left, after + right
+
+    def _encode(self, border, title, drawing):
+        left, columns, intersect, right = border
+        if title and columns:
+            placed = self._placeTitle(border, title)
+            if placed is not None:
+                before, after = placed
+                return drawing(before) + title + drawing(after)
+        return drawing(left + intersect.join(columns) + right)
+
+    def _lineDrawing(self, border, title=None):
+        """Encode a border with line drawing characters"""
+        if isinstance(border, str):
+            return LINE_DRAWING + border + LINE_DRAWING_END
+        return self._encode(border, title, lambda chars: LINE_DRAWING + chars + LINE_DRAWING_END)
+
+    def _ascii(self, border, title=None):
+        """Encode a border with ASCII characters"""
+        if isinstance(border, str):
+            return border.translate(ASCII_BORDERS)
+        return self._encode(border, title, lambda chars: chars.translate(ASCII_BORDERS))
@@ -1,121 +1,169 @@
 #!/usr/bin/env python
 from __future__ import print_function
 
-from colorclass import Color
-from terminaltables import SingleTable
+import sys
+
 from constants import *
 from textwrap import wrap
+from changeRecords import BundleStyleChanged, EntityEvent, ListMembershipChanged
+from tableRenderer import Colored, Table
 
 
-def group_data(data, index=0):
+def group_data(changes):
+    """Group change records by the name of their entity, keeping their order"""
     grouped_data = {}
-    for row in data:
-        key = row[index]
-        if key in grouped_data:
-            grouped_data[key].append(row[:index] + row[index+1:])
+    for change in changes:
+        if change.entity_name in grouped_data:
+            grouped_data[change.entity_name].append(change)
         else:
-            grouped_data[key] = [row[:index] + row[index+1:]]
+            grouped_data[change.entity_name] = [change]
     return grouped_data
 
 
-def generate_summary(events, list_type_modification, nonlist_modification, catalog_a, catalog_b):
-    added_count = removed_count = modified_count = created_count = destroyed_count = 0
-    
-    # count created and destroyed entities
-    for event in events:
-        if event == 'created':
-            created_count += 1
-        else:
-            destroyed_count += 1
+def new_summary_counts():
+    """Returns zero counts of every kind of event in a summary"""
+    return dict.fromkeys(SUMMARY_COUNT_KEYS, 0)
 
-    # count added, removed and modified entities
-    for uuids, *_, event in list_type_modification:
-        if isinstance(uuids, list):
-            if event == 'added':
-                added_count += len(uuids)
-            else:
-                removed_count += len(uuids)
+
+def count_change(counts, change):
+    """Counts a change record into the `counts` of a summary"""
+    if isinstance(change, EntityEvent):
+        # created and destroyed entities
+        counts[change.event] += 1
+    elif isinstance(change, ListMembershipChanged):
+        # added and removed values
+        count = len(change.member_uuids) if change.member_uuids else 1
+        if change.event == 'added':
+            counts['added'] += count
         else:
-            if event == 'added':
-                added_count += 1
-            else:
-                removed_count += 1
+            counts['removed'] += count
+    elif isinstance(change, BundleStyleChanged):
+        # bundleStyle keys aren't attributes, added and removed ones are modifications too
+        counts['modified'] += 1
+    elif change.event == ATTRIBUTE_ADDED:
+        counts['attributes_added'] += 1
+    elif change.event == ATTRIBUTE_REMOVED:
+        counts['attributes_removed'] += 1
+    else:
+        counts['modified'] += 1
+
+
+def count_changes(*changes):
+    """Returns the summary counts of all change records in the given lists"""
+    counts = new_summary_counts()
+    for records in changes:
+        for change in records:
+            count_change(counts, change)
+    return counts
 
-    for _ in nonlist_modification:
-        modified_count += 1
 
+def generate_summary(events, list_type_modification, nonlist_modification, catalog_a, catalog_b):
+    counts = count_changes(events, list_type_modification, nonlist_modification)
+    return format_summary(counts, catalog_a, catalog_b)
+
+
+def format_summary(counts, catalog_a, catalog_b):
+    """Returns the summary message of the `counts` of all events"""
     # Generate the summary message
     summary = ""
     summary += f'Summary:\n'
     summary += f'Summary for {catalog_a} -> {catalog_b}\n'
-    summary += f'{created_count} were created\n'
-    summary += f'{destroyed_count} were destroyed\n'
-    summary += f'{added_count} were added\n'
-    summary += f'{removed_count} were removed\n'
-    summary += f'{modified_count} were modified\n'
+    summary += f'{counts["created"]} were created\n'
+    summary += f'{counts["destroyed"]} were destroyed\n'
+    summary += f'{counts["added"]} were added\n'
+    summary += f'{counts["removed"]} were removed\n'
+    summary += f'{counts["modified"]} were modified\n'
+    summary += f'{counts["attributes_added"]} attributes were added\n'
+    summary += f'{counts["attributes_removed"]} attributes were removed\n'
 
     return summary
 
 
-def Print_Entities_Tables(entity_names, display_names, events, uuids):
-    """Return table string to be printed."""
-    tables = ''
-    group_by_entities_name: dict = group_data(zip(entity_names, display_names, events, uuids))
+def write_table(stream, table_instance, end):
+    """Writes a table to `stream` line by line, followed by `end`
+    Returns the number of rows written, without the heading"""
+    table_instance.write(stream)
+    stream.write(end)
+    return len(table_instance.table_data) - 1
+
+
+def get_event_color(event):
+    """Color of a modification event, green and red for added and removed attributes"""
+    if event == ATTRIBUTE_ADDED:
+        return 'green'
+    if event == ATTRIBUTE_REMOVED:
+        return 'red'
+    return 'blue'
+
+
+def Print_Entities_Tables(changes, stream=None):
+    """Writes a table per entity type to `stream` (stdout by default), each one when it's ready
+    `changes` are EntityCreated and EntityDestroyed records
+    Returns the number of rows written"""
+    if stream is None:
+        stream = sys.stdout
+    rows = 0
+    group_by_entities_name: dict = group_data(changes)
     for entity_name, list_of_rows in group_by_entities_name.items():
         table_data = [
-            [Color('UUID'), Color('Asset'), Color('Event')],
+            ['UUID', 'Asset', 'Event'],
         ]
-        for (display_name, event, uuid) in list_of_rows: 
+        for change in list_of_rows: 
+            event = change.event
             if event == 'created':
                 color = 'autogreen'
             else:
                 color = 'autored'
-            if display_name != '':
-                table_data.append( [Color(uuid), Color(display_name), Color(f'{{{color}}}%s{{/{color}}}' % event)] )
+            if change.display_name != '':
+                table_data.append( [change.uuid, change.display_name, Colored(event, color)] )
         
         if len(table_data) <= 1:
             continue
-        table_instance = SingleTable(table_data, entity_name)
+        table_instance = Table(table_data, entity_name)
         # table_instance.inner_heading_row_border = False
         table_instance.inner_row_border = True
         table_instance.justify_columns = {0: 'center', 1: 'center', 2: 'center'}
-        tables += table_instance.table + '\n\n\n'
+        rows += write_table(stream, table_instance, '\n\n\n')
 
-    return tables
+    return rows
 
 
-def Print_Assets_Changed_Table(assets_changed):
+def Print_Assets_Changed_Table(assets_changed, stream):
     table_data = [
-            [Color('UUID'), Color('Key'), Color('Old Value'), Color('New Value'), Color('Event')],
+            ['UUID', 'Key', 'Old Value', 'New Value', 'Event'],
         ]
-    for (uuid, key, old_value, new_value, event) in assets_changed:
-        table_data.append( [Color(uuid), Color(key), Color('\n'.join(wrap(str(old_value), 40))),
-                            Color('\n'.join(wrap(str(new_value), 40))), 
-                            Color('{autoblue}%s{/autoblue}' % event)] )
+    for change in assets_changed:
+        color = 'auto' + get_event_color(change.event)
+        table_data.append( [change.uuid, change.key, '\n'.join(wrap(str(change.old_value), 40)),
+                            '\n'.join(wrap(str(change.new_value), 40)), 
+                            Colored(change.event, color)] )
     
     # Prevent creating an empty table
     if len(table_data) <= 1:
-        return ''
+        return 0
 
-    table_instance = SingleTable(table_data, f"Value Changed Assets")
+    table_instance = Table(table_data, f"Value Changed Assets")
     # table_instance.inner_heading_row_border = False
     table_instance.inner_row_border = True
     table_instance.justify_columns = {0: 'center', 1: 'center', 2: 'center'}
 
-    return table_instance.table + '\n\n\n'
+    return write_table(stream, table_instance, '\n\n\n')
 
 
-def Print_Entities_Changed_Tables(modifications):
-    """Return table string to be printed."""
+def Print_Entities_Changed_Tables(modifications, stream=None):
+    """Writes the tables of changed values to `stream` (stdout by default), each one when it's ready
+    Returns the number of rows written"""
     # This function here is used for the entities that were changed
-    tables = ''
-    group_by_entities_name = group_data(modifications, index=1)
+    if stream is None:
+        stream = sys.stdout
+    rows = 0
+    group_by_entities_name = group_data(modifications)
     assets_changed = []
     bundle_changed = []
     other_entities_changed = {}
     for entity_name, list_of_rows in group_by_entities_name.items():
         table_data = [
-            [Color('UUID'), Color('Display Name'), Color('Key'), Color('Old Value'), Color('New Value'), Color('Event')],
+            ['UUID', 'Display Name', 'Key', 'Old Value', 'New Value', 'Event'],
         ]
         #! Comment CCAsset logic
         if entity_name == 'CCAsset':
@@ -125,142 +173,151 @@ def Print_Entities_Changed_Tables(modifications):
             other_entities_changed[entity_name] = list_of_rows
             continue
         
-        for row in list_of_rows:
-            if len(row) == 6:
-                (uuid, display_name, key, old_value, new_value, event) = row
-                table_data.append( [Color(uuid), Color(display_name), Color(key), 
-                                    Color('\n'.join(wrap(old_value, 40))), 
-                                    Color('\n'.join(wrap(new_value, 40))),
-                                    Color('{autoblue}%s{/autoblue}' % event)] )
-            elif len(row) == 5:
-                bundle_changed.append([entity_name] + list(row))
+        for change in list_of_rows:
+            if isinstance(change, BundleStyleChanged):
                 # BundleStyle was changed
+                bundle_changed.append(change)
+            else:
+                color = 'auto' + get_event_color(change.event)
+                table_data.append( [change.uuid, change.display_name, change.key, 
+                                    '\n'.join(wrap(str(change.old_value), 40)), 
+                                    '\n'.join(wrap(str(change.new_value), 40)),
+                                    Colored(change.event, color)] )
         if len(table_data) > 1:
-            table_instance = SingleTable(table_data, f"Value Changed {entity_name}")
+            table_instance = Table(table_data, f"Value Changed {entity_name}")
             # table_instance.inner_heading_row_border = False
             table_instance.inner_row_border = True
             table_instance.justify_columns = {0: 'center', 1: 'center', 2: 'center'}
-            tables += table_instance.table + '\n\n\n'
+            rows += write_table(stream, table_instance, '\n\n\n')
 
         
     table_data = [
-                    [Color('UUID'), Color('Entity Name'), Color('Key'), Color('Old Value'), Color('New Value'), Color('Event')],
+                    ['UUID', 'Entity Name', 'Key', 'Old Value', 'New Value', 'Event'],
                  ]
-    for row in bundle_changed:
-        (entity_name, uuid, key, old_value, new_value, event) = row
-        table_data.append( [Color(uuid), Color(entity_name), Color(key), 
-                            Color('\n'.join(wrap(str(old_value), 40))), 
-                            Color('\n'.join(wrap(str(new_value), 40))),
-                            Color.colorize('magenta', event)] )
+    for change in bundle_changed:
+        event = change.event
+        table_data.append( [change.uuid, change.entity_name, change.key, 
+                            '\n'.join(wrap(str(change.old_value), 40)), 
+                            '\n'.join(wrap(str(change.new_value), 40)),
+                            Colored(event, 'magenta' if event == 'critical change' else get_event_color(event))] )
 
     if len(table_data) > 1:
-        table_instance = SingleTable(table_data, f"BundleStyle Changed")
+        table_instance = Table(table_data, f"BundleStyle Changed")
         table_instance.inner_row_border = True
         table_instance.justify_columns = {0: 'center', 1: 'center', 2: 'center'}
-        tables += table_instance.table + '\n\n\n'
+        rows += write_table(stream, table_instance, '\n\n\n')
 
 
     # Entities which do not have display name
     # Less important entities like CCNotification etc.
-    for entity_name, rows in other_entities_changed.items():
+    for entity_name, list_of_rows in other_entities_changed.items():
         table_data = [
-                        [Color('UUID'), Color('Key'), Color('Old Value'), Color('New Value'), Color('Event')],
+                        ['UUID', 'Key', 'Old Value', 'New Value', 'Event'],
                      ]
-        for row in rows:
-            (uuid, key, old_value, new_value, event) = row
-            table_data.append( [Color(uuid), Color(key), 
-                                Color('\n'.join(wrap(str(old_value), 40))), 
-                                Color('\n'.join(wrap(str(new_value), 40))),
-                                Color.colorize('blue', event)] )
+        for change in list_of_rows:
+            table_data.append( [change.uuid, change.key, 
+                                '\n'.join(wrap(str(change.old_value), 40)), 
+                                '\n'.join(wrap(str(change.new_value), 40)),
+                                Colored(change.event, get_event_color(change.event))] )
 
         if len(table_data) > 1:
-            table_instance = SingleTable(table_data, f"{entity_name} Changed")
+            table_instance = Table(table_data, f"{entity_name} Changed")
             table_instance.inner_row_border = True
             table_instance.justify_columns = {0: 'center', 1: 'center', 2: 'center'}
-            tables += table_instance.table + '\n\n\n'
+            rows += write_table(stream, table_instance, '\n\n\n')
 
 
     # Changes made in Assets
-    tables += Print_Assets_Changed_Table(assets_changed)
+    rows += Print_Assets_Changed_Table(assets_changed, stream)
 
-    return tables
+    return rows
 
 
-def Print_Entities_Changed_For_Lists_Tables(modifications, *args):
-    """Return table string to be printed."""
+def Print_Entities_Changed_For_Lists_Tables(modifications, session=None, stream=None):
+    """Writes the tables of added and removed values to `stream` (stdout by default), each one when it's ready
+    The content filters of `session` (a DiffSession) are used to describe changed ContentFilters
+    Returns the number of rows written"""
     # This function here is used for the entities that were added or removed
-    tables = ''
-    tables += '------------------------\n'
-    tables += 'These values were modified:'
-    tables += '\n\n\n\n'
+    if stream is None:
+        stream = sys.stdout
+    rows = 0
+    stream.write('------------------------\n')
+    stream.write('These values were modified:')
+    stream.write('\n\n\n\n')
     content_filters = []
-    group_by_entities_name = group_data(modifications, index=1)
+    group_by_entities_name = group_data(modifications)
     for entity_name, list_of_rows in group_by_entities_name.items():
         table_data = [
-            [Color('UUID'), Color('Display Name'), Color('Attribute'), Color('Value'), Color('Event')],
+            ['UUID', 'Display Name', 'Attribute', 'Value', 'Event'],
         ]
-        for (uuids, display_name, key, value, event) in list_of_rows: 
+        for change in list_of_rows: 
+            event = change.event
             if event == 'added':
                 color = 'autogreen'
             else:
                 color = 'autored'
                 
-            if isinstance(uuids, list):
+            if change.member_uuids:
                 # More than 1 value added or removed in an attribute
-               for uuid, sub_value in zip(uuids, value.split(',')):
-                    table_data.append( [Color(uuid), Color(display_name), Color(key), Color(sub_value),
-                                        Color(f'{{{color}}}%s{{/{color}}}' % event)] )
+               for uuid, sub_value in zip(change.member_uuids, change.value.split(',')):
+                    table_data.append( [uuid, change.display_name, change.key, sub_value,
+                                        Colored(event, color)] )
             else:
-                if key == 'ContentFilters':
-                    content_filters.append([uuids, entity_name, display_name, key, value, event, color])
+                if change.key == 'ContentFilters':
+                    content_filters.append(change)
                     continue
-                table_data.append( [Color(uuids), Color(display_name), Color(key), Color(value),
-                                    Color(f'{{{color}}}%s{{/{color}}}' % event)] )
+                table_data.append( [change.uuid, change.display_name, change.key, change.value,
+                                    Colored(event, color)] )
         
         # Make sure no empty table is printed
         if len(table_data) <= 1:
             continue
 
-        table_instance = SingleTable(table_data, f"Changed {entity_name}")
+        table_instance = Table(table_data, f"Changed {entity_name}")
         # table_instance.inner_heading_row_border = False
         table_instance.inner_row_border = True
         table_instance.justify_columns = {0: 'center', 1: 'center', 2: 'center'}
-        tables += table_instance.table + '\n\n\n'
+        rows += write_table(stream, table_instance, '\n\n\n')
 
 
     if content_filters:
         table_data = [
-            [Color('UUID'), Color('Entity Name'), Color('Description'), Color('Countries'), Color('Extension'), Color('Event')],
+            ['UUID', 'Entity Name', 'Description', 'Countries', 'Extension', 'Event'],
         ]
-        if args:
-            for content_filter in content_filters:
-                uuid, entity_name, display_name, key, value, event, color = content_filter
+        if session:
+            for change in content_filters:
+                event = change.event
+                color = 'autogreen' if event == 'added' else 'autored'
+                index = session.index_b if event == 'added' else session.index_a
                 try:
-                    if event == 'added':
-                        content_filter_data = args[1] # content_filters_b
-                    else:
-                        content_filter_data = args[0] # content_filters_a
-                    content_filter = content_filter_data[value]
+                    content_filter = index.content_filters_language[change.value]
                 except:
-                    if event == 'added':
-                        content_filter_data = args[3] # content_filters_region_b
-                    else:
-                        content_filter_data = args[2] # content_filters_region_a
-                    content_filter = content_filter_data[value]
-                description, countries, exclusion = get_description_countries_exclusion_from_content_filters(content_filter)
-                table_data.append( [Color(uuid), Color(f"{entity_name}: {display_name}"), Color('\n'.join(wrap(description, 30))), 
-                                    Color('\n'.join(wrap(countries, 30))), Color(exclusion),
-                                    Color(f'{{{color}}}%s{{/{color}}}' % event)] )
-
-        table_instance = SingleTable(table_data, f"ContentFilters")
+                    content_filter = index.content_filters_region[change.value]
+                description, countries, exclusion = get_description_countries_exclusion_from_content_filters(
+                    content_filter, index.attributes.get(content_filter['uuid'])
+                )
+                table_data.append( [change.uuid, f"{change.entity_name}: {change.display_name}", '\n'.join(wrap(description, 30)), 
+                                    '\n'.join(wrap(countries, 30)), exclusion,
+                                    Colored(event, color)] )
+
+        table_instance = Table(table_data, f"ContentFilters")
         # table_instance.inner_heading_row_border = False
         table_instance.inner_row_border = True
         table_instance.justify_columns = {0: 'center', 1: 'center', 2: 'center'}
-        tables += table_instance.table + '\n\n'
+        rows += write_table(stream, table_instance, '\n\n')
+
+    return rows
+
 
-    return tables  
+def get_description_countries_exclusion_from_content_filters(content_filter, attributes=None):
+    """Returns the Description, countries and Exclusion Type of a content filter
+    `attributes` is the filter's name -> value map from its CatalogIndex, if there is one"""
+    if attributes is not None:
+        countries = attributes.get('FilteredLanguages', attributes.get('FilteredRegions'))
+        if countries is not None:
+            countries = ', '.join(countries)
+        return attributes.get('Description'), countries, attributes.get('Exclusion Type')
 
-def get_description_countries_exclusion_from_content_filters(content_filter):
     description = countries = exclusion = None
     for attribute in content_filter['attributes']:
         if attribute['name'] == 'Description':
@@ -0,0 +1,70 @@
+#!python3
+"""tableRenderer.Table against terminaltables' SingleTable, on seeded random tables
+
+With colors on, Table has to draw every table byte for byte like the
+SingleTable it replaced, with the cells wrapped in colorclass Colors."""
+import random
+import unittest
+
+from colorclass import Color
+from terminaltables import SingleTable
+
+from tableRenderer import Colored, Table
+
+WORDS = [
+    "", "a", "ab", "héllo", "日本", "x y z", "longer text here", "a\nbb\nccc",
+    "12345678901234567890", "a\n", "x\ny\n", "\n",
+]
+TITLES = [None, "T", "Title", "A much longer title than the cell"]
+COLORS = ["autogreen", "autored", "red", "magenta"]
+
+
+class TableTest(unittest.TestCase):
+
+    def randomTables(self, seed, count):
+        """Yield the same random table as a SingleTable and as a Table"""
+        rnd = random.Random(seed)
+        for _ in range(count):
+            columns = rnd.randint(1, 5)
+            expected_data, data = [], []
+            for _ in range(rnd.randint(1, 5)):
+                expected_row, row = [], []
+                # Some rows are shorter than the others
+                for _ in range(columns if rnd.random() > 0.1 else rnd.randint(1, columns)):
+                    word = rnd.choice(WORDS)
+                    if word and "\n" not in word and rnd.random() < 0.3:
+                        color = rnd.choice(COLORS)
+                        expected_row.append(Color("{%s}%s{/%s}" % (color, word, color)))
+                        row.append(Colored(word, color))
+                    else:
+                        expected_row.append(Color(word))
+                        row.append(word)
+                expected_data.append(expected_row)
+                data.append(row)
+            title = rnd.choice(TITLES + ["x" * rnd.randint(1, 60)])
+            justify_columns = {i: rnd.choice(["center", "left", "right"]) for i in range(columns) if rnd.random() < 0.7}
+            inner_row_border = rnd.random() < 0.5
+
+            expected = SingleTable(expected_data, title)
+            table = Table(data, title)
+            for instance in (expected, table):
+                instance.justify_columns = justify_columns
+                instance.inner_row_border = inner_row_border
+            yield expected, table
+
+    def test_matches_single_table(self):
+        compared = 0
+        for expected, table in self.randomTables(0, 2000):
+            try:
+                expected_table = expected.table
+            except IndexError:
+                # SingleTable can't draw some rows with trailing newlines at all
+                continue
+            with self.subTest(data=table.table_data, title=table.title):
+                self.assertEqual(expected_table, "\n".join(table.lines(color=True)))
+            compared += 1
+        self.assertGreater(compared, 1000)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,17 @@
 #!python3
 import os
 
+from comparisonProgress import progressReporter
+
+def hidesValue(v):
+    """Check whether a looked up value is treated as absent (mentions CompatibilityVersion)"""
+    try:
+        return "CompatibilityVersion" in v
+    except TypeError:
+        # Not a container, can't mention anything
+        return False
+
+
 def getVal(pl, path):
     """Get a value from a plist-dict by it's dot separated path"""
     # Try to access the full path level by level
@@ -12,17 +23,40 @@ def getVal(pl, path):
     # Return None if the key doesn't exist on b
     except KeyError:
         return None
-    if "CompatibilityVersion" in curr:
+    if hidesValue(curr):
         return None
     return curr
 
 
+class Entries(list):
+    """Diff result entries of a single path
+
+    A plain list to consumers, which also keeps a fingerprint of every entry
+    so duplicates are turned away in constant time."""
+
+    __slots__ = ("fingerprints",)
+
+    def __init__(self):
+        super().__init__()
+        self.fingerprints = set()
+
+    def add(self, entry):
+        """Append an entry, unless an equal one is already there"""
+        fingerprint = (
+            freezeValue(entry["a"]),
+            freezeValue(entry["b"]),
+            entry["sequence"],
+        )
+        if fingerprint in self.fingerprints:
+            return
+        self.fingerprints.add(fingerprint)
+        self.append(entry)
+
+
 def mkEntry(a, b, idx, path, isrev, res):
     """Make diff result list entry"""
     if not path in res:
-        res[path] = []
-
-    targ = res[path]
+        res[path] = Entries()
 
     # Generate new entry
     entry = (
@@ -32,11 +66,7 @@ def mkEntry(a, b, idx, path, isrev, res):
     )
 
     # Don't append duplicates
-    for i in targ:
-        if i == entry:
-            return
-
-    targ.append(entry)
+    res[path].add(entry)
 
 
 def dictEq(a, b):
@@ -47,35 +77,203 @@ def dictEq(a, b):
     return True
 
 
-def diffPlists(a, b):
-    """Diff two plists by checking them against each other"""
+def diffPlists(a, b, progress=None):
+    """Diff two plists by walking both of them at once
+
+    Every key path is visited a single time and is either only in a, only
+    in b or in both, in the order of `walkKeys`. Entries seen from b's side
+    are kept apart and appended after a's, in the order the former
+    b-against-a pass produced them.
+
+    With a `progress` callback (see comparisonProgress) the plists are diffed
+    part by part instead, see `splitDiff`, reporting the entities done."""
+    if progress is not None:
+        return diffInParts(a, b, progressReporter(progress))
+
+    seqA = {key: idx for idx, key in enumerate(a)}
+    seqB = {key: idx for idx, key in enumerate(b)}
+    return mergeParts(
+        diffPart(a, b, key, seqA.get(key), seqB.get(key), [])
+        for key in walkKeys(a, b)
+    )
+
+
+def walkKeys(a, b):
+    """Yield the keys of dicts a and b in the order `diffPlists` visits them
+
+    Keys only in b come right before the next key both of them share,
+    as b's side of the walk meets them."""
+    restB = iter(b)
+    for key in a:
+        if key in b:
+            for keyB in restB:
+                if keyB == key:
+                    break
+                if keyB not in a:
+                    yield keyB
+        yield key
+    for keyB in restB:
+        if keyB not in a:
+            yield keyB
+
+
+def splitDiff(a, b):
+    """Split the diff of two plists into independent parts
+
+    Returns `(a, b, key, idxA, idxB, keys)` arguments of `diffPart` in the
+    order `diffPlists` visits them. Dicts in both plists are split once more,
+    so every entity type of a catalog is a part of its own."""
+    seqA = {key: idx for idx, key in enumerate(a)}
+    seqB = {key: idx for idx, key in enumerate(b)}
+
+    parts = []
+    for key in walkKeys(a, b):
+        idxA = seqA.get(key)
+        idxB = seqB.get(key)
+        valA = a.get(key)
+        valB = b.get(key)
+        if key in a and key in b and isinstance(valA, dict) and isinstance(valB, dict):
+            for subkey in walkKeys(valA, valB):
+                parts.append((
+                    {subkey: valA[subkey]} if subkey in valA else {},
+                    {subkey: valB[subkey]} if subkey in valB else {},
+                    subkey, idxA, idxB, [key],
+                ))
+        else:
+            parts.append((
+                {key: valA} if key in a else {},
+                {key: valB} if key in b else {},
+                key, idxA, idxB, [],
+            ))
+    return parts
+
+
+def partPath(part):
+    """Path of the value a part of `splitDiff` diffs, like entities.CCAsset"""
+    return ".".join(part[5] + [part[2]])
+
+
+def partSize(part):
+    """Number of entities (or keys) of the bigger side of a part of `splitDiff`"""
+    a, b, k = part[:3]
+    return max(
+        len(side[k]) if isinstance(side.get(k), (dict, list)) else 1
+        for side in (a, b)
+    )
+
+
+def diffInParts(a, b, progress):
+    """Diff two plists part by part, reporting every part to `progress` (a ProgressReporter)
+    Returns the same as `diffPlists`"""
+    parts = splitDiff(a, b)
+    progress.begin("diff", sum(partSize(part) for part in parts))
+    results = []
+    for part in parts:
+        results.append(diffPart(*part))
+        progress.advance(partPath(part), partSize(part))
+    return mergeParts(results)
+
+
+def diffPart(a, b, k, idxA, idxB, keys):
+    """Diff a single key of a and b, see `splitDiff`
+
+    Returns the entries seen from a's and from b's side, paths in both of
+    them are already merged into a's. Parts can be diffed in any order, or
+    in other processes, and are put together by `mergeParts`."""
+    res = {}
+    rev = {}
+    diffEither(a, b, k, idxA, idxB, keys, res, rev)
+
+    for path in [path for path in rev if path in res]:
+        targ = res[path]
+        for entry in rev.pop(path):
+            targ.add(entry)
+    return res, rev
+
+
+def mergeParts(parts):
+    """Put the diffed parts of `splitDiff` together, in their order
+
+    The result equals the one of `diffPlists` on the whole plists."""
     res = {}
-    # Diff a against b
-    for idx, it in enumerate(a.items()):
-        key = it[0]
-        diffKey(a, b, key, idx, key, False, res)
-
-    # Diff b against a
-    for idx, it in enumerate(b.items()):
-        key = it[0]
-        diffKey(b, a, key, idx, key, True, res)
+    revs = []
+    for resPart, revPart in parts:
+        res.update(resPart)
+        revs.append(revPart)
+
+    for rev in revs:
+        for path, entries in rev.items():
+            targ = res.get(path)
+            if targ is None:
+                res[path] = entries
+                continue
+            for entry in entries:
+                targ.add(entry)
     return res
 
 
+def diffEither(a, b, k, idxA, idxB, keys, res, rev):
+    """Diff a key that exists in a, in b or in both of them"""
+    if k not in b:
+        # Only in a
+        diffKey(a, b, k, idxA, keys, False, res)
+    elif k not in a:
+        # Only in b
+        diffKey(b, a, k, idxB, keys, True, rev)
+    else:
+        diffBoth(a, b, k, idxA, idxB, keys, res, rev)
+
+
+def diffBoth(a, b, k, idxA, idxB, keys, res, rev):
+    """Diff a key that exists in both a and b recursively (with all subkeys)"""
+    valA = a[k]
+    valB = b[k]
+
+    # Both dicts, walk the union of their keys
+    if isinstance(valA, dict) and isinstance(valB, dict):
+        keys.append(k)
+        for key in walkKeys(valA, valB):
+            diffEither(valA, valB, key, idxA, idxB, keys, res, rev)
+        keys.pop()
+        return
+
+    # Both scalars, a difference is the same entry seen from either side
+    if (
+        isScalar(valA)
+        and isScalar(valB)
+        and not hidesValue(valA)
+        and not hidesValue(valB)
+    ):
+        if valA != valB:
+            keys.append(k)
+            path = ".".join(keys)
+            keys.pop()
+            mkEntry(valA, valB, idxA, path, False, res)
+            if idxB != idxA:
+                mkEntry(valB, valA, idxB, path, True, rev)
+        return
+
+    # Lists or differing types, each side has to be checked against the other
+    diffKey(a, b, k, idxA, keys, False, res)
+    diffKey(b, a, k, idxB, keys, True, rev)
+
+
+# Known and unique-ifying keys, used to pair up dicts that differ
+KNOWN_KEYS = (
+    "BundlePath",
+    "ExecutablePath",
+    "Path",
+    "Address",
+    "Find",
+    "Replace",
+    "Identifier",
+)
+
+
 def diffKnownKeys(a, b):
     """Diff only known and unique-ifying keys, return a score of matched values"""
-    knownKeys = [
-        "BundlePath",
-        "ExecutablePath",
-        "Path",
-        "Address",
-        "Find",
-        "Replace",
-        "Identifier",
-    ]
-
     score = 0
-    for key in knownKeys:
+    for key in KNOWN_KEYS:
         # Key must be in both a and b; otherwise continue
         # in other words, key not in either one of the list
         if key not in a or key not in b:
@@ -88,97 +286,159 @@ def diffKnownKeys(a, b):
     return score
 
 
-def findMostSimilar(a, lst):
-    """Find most similar matching dict within list by known keys"""
-    # Generate hit-list
-    hits = [[b, diffKnownKeys(a, b)] for b in lst]
-    hits = list(filter(lambda x: x[1] != 0, hits))
+def indexKnownKeys(lst):
+    """Map every (known key, value) pair of a list's dicts to their positions"""
+    index = {}
+    for pos, b in enumerate(lst):
+        if not isinstance(b, dict):
+            continue
+        for key in KNOWN_KEYS:
+            if key in b:
+                index.setdefault((key, freezeValue(b[key])), []).append(pos)
+    return index
+
+
+def findMostSimilar(a, lst, index=None):
+    """Find most similar matching dict within list by known keys
+
+    Only the dicts sharing a known key's value with `a` are scored, pass
+    the `indexKnownKeys` of `lst` when looking up many dicts in it."""
+    if index is None:
+        index = indexKnownKeys(lst)
+
+    # Generate hit-list, a score per position
+    hits = {}
+    for key in KNOWN_KEYS:
+        if key not in a:
+            continue
+        for pos in index.get((key, freezeValue(a[key])), ()):
+            hits[pos] = hits.get(pos, 0) + 1
 
     # No similar items
     if len(hits) == 0:
         return None
 
-    # Return most similar
-    hits.sort(key=lambda x: x[1], reverse=True)
-    return hits[0][0]
+    # Return most similar, the first one in the list on equal scores
+    best = max(hits, key=lambda pos: (hits[pos], -pos))
+    return lst[best]
+
+
+def freezeValue(v):
+    """Turn a plist value into a hashable one, equal values freeze to equal keys"""
+    if isinstance(v, dict):
+        return frozenset((key, freezeValue(val)) for key, val in v.items())
+    if isinstance(v, list):
+        return tuple(freezeValue(i) for i in v)
+    return v
+
+
+def indexDicts(lst, keys):
+    """Bucket the dicts of a list by the frozen values of `keys`
+
+    A dict `i` with exactly these keys has a `dictEq` partner in `lst`
+    if and only if its own frozen values are in the returned set."""
+    return {
+        tuple(freezeValue(j.get(key)) for key in keys)
+        for j in lst
+        if isinstance(j, dict)
+    }
 
 
-def diffList(b, lst, idx, path, isrev, res):
-    """Diff a list by diffing it's items"""
-    other = getVal(b, path)
+def diffList(other, lst, idx, keys, isrev, res):
+    """Diff a list by diffing it's items against the other side's value"""
+    if hidesValue(other):
+        other = None
     # Not a list, comparison impossible
     if not isinstance(other, list):
-        mkEntry(lst, "<not a list>", idx, path, isrev, res)
+        mkEntry(lst, "<not a list>", idx, ".".join(keys), isrev, res)
         return
 
+    # Lookup tables of the other list, only built when needed
+    # dicts are bucketed per key-set, because dictEq only looks at a's keys
+    scalars = None
+    buckets = {}
+    similars = None
+    path = None
+
     for i in lst:
         if isinstance(i, list):
             # Nested Lists not implemented yet
             raise NotImplementedError()
 
         isdict = isinstance(i, dict)
-        exists = False
-        for j in other:
-            if isinstance(i, list):
-                # Nested Lists not implemented yet
-                raise NotImplementedError()
-
-            if isdict:
-                # Can only compare dict against dict
-                if not isinstance(j, dict):
-                    continue
-
-                # Compare dicts
-                if not dictEq(i, j):
-                    continue
-
-                exists = True
-                break
-
-            # Compare scalars
-            else:
-                if i == j:
-                    exists = True
-                    break
+        if isdict:
+            signature = frozenset(i)
+            bucket = buckets.get(signature)
+            if bucket is None:
+                keyset = tuple(signature)
+                bucket = buckets[signature] = (keyset, indexDicts(other, keyset))
+            keyset, hashes = bucket
+            exists = tuple(freezeValue(i[key]) for key in keyset) in hashes
+
+        # Compare scalars
+        else:
+            if scalars is None:
+                scalars = {j for j in other if isScalar(j)}
+            exists = i in scalars
+
+        # Existing exactly like this in the other list
+        if exists:
+            continue
+
+        if path is None:
+            path = ".".join(keys)
+        if isdict:
+            if similars is None:
+                similars = indexKnownKeys(other)
+            similar = findMostSimilar(i, other, similars)
+            mkEntry(
+                i,
+                similar if similar is not None else "<no entry>",
+                idx,
+                path,
+                isrev,
+                res,
+            )
+        else:
+            mkEntry(i, "<no list partner>", idx, path, isrev, res)
 
-        # Not existing exactly like this in the other list
-        if not exists:
-            if isdict:
-                similar = findMostSimilar(i, other)
-                mkEntry(
-                    i,
-                    similar if similar is not None else "<no entry>",
-                    idx,
-                    path,
-                    isrev,
-                    res,
-                )
-            else:
-                mkEntry(i, "<no list partner>", idx, path, isrev, res)
-
-
-def diffScalar(b, v, idx, path, isrev, res):
-    """Diff a scalar value (content and type is equal)"""
-    other = getVal(b, path)
+
+def diffScalar(other, v, idx, keys, isrev, res):
+    """Diff a scalar value against the other side's value (content and type is equal)"""
+    if hidesValue(other):
+        other = None
     if v != other:
-        mkEntry(v, other if other is not None else "<no entry>", idx, path, isrev, res)
+        mkEntry(
+            v,
+            other if other is not None else "<no entry>",
+            idx,
+            ".".join(keys),
+            isrev,
+            res,
+        )
+
 
+def diffKey(a, b, k, idx, keys, isrev, res):
+    """Diff a key recursively (with all subkeys)
 
-def diffKey(a, b, k, idx, path, isrev, res):
-    """Diff a key recursively (with all subkeys)"""
+    `b` is the other side's dict at the same level as `a`, so nothing is
+    looked up from the root again. `keys` is the path leading to `a`."""
     val = a[k]
+    other = b.get(k) if isinstance(b, dict) else None
 
+    keys.append(k)
     # Another key to a dict
     if isinstance(val, dict):
         for key in val:
-            diffKey(val, b, key, idx, f"{path}.{key}", isrev, res)
+            diffKey(val, other, key, idx, keys, isrev, res)
     else:
         # Diff list items
         if isinstance(val, list):
-            diffList(b, val, idx, path, isrev, res)
+            diffList(other, val, idx, keys, isrev, res)
         # Diff scalar value
         else:
-            diffScalar(b, val, idx, path, isrev, res)
+            diffScalar(other, val, idx, keys, isrev, res)
+    keys.pop()
 
 
 def validatePath(path):
@@ -191,6 +451,27 @@ def validatePath(path):
         raise ValueError("Please only provide .plist or .ccdoc files for comparison")
 
 
+def findCatalogs(directory):
+    """Relative paths of all .plist and .ccdoc files below a directory, sorted"""
+    paths = []
+    for root, dirs, files in os.walk(directory):
+        for name in files:
+            if os.path.splitext(name)[1] in (".plist", ".ccdoc"):
+                paths.append(os.path.relpath(os.path.join(root, name), directory))
+    return sorted(paths)
+
+
+def pairCatalogs(dirA, dirB):
+    """Pair the catalogs of two directories by their relative path
+    Returns the paired relative paths and the ones only found in a or in b"""
+    a = findCatalogs(dirA)
+    b = findCatalogs(dirB)
+    inB = set(b)
+    inA = set(a)
+    pairs = [path for path in a if path in inB]
+    return pairs, [path for path in a if path not in inB], [path for path in b if path not in inA]
+
+
 def visualPrint(v):
     """Print structures optimized for readability"""
     if isinstance(v, dict):